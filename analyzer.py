@@ -1,15 +1,30 @@
-import os
 import re
-import fitz  # PyMuPDF
-from datetime import datetime
+import time
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from config import (
+    EXTRACT_MAX_PAGES,
+    CV_TOKEN_BUDGET,
+    OPENAI_MODEL,
+    OPENAI_TEMPERATURE,
+    STREAM_RESPONSES,
+    STRUCTURED_OUTPUT,
+    STRUCTURED_MAX_TOKENS,
+)
+from extractors import EXTRACT_VERSION, ExtractionError, Upload, extract_blocks_async
+from renderer import render, render_text
+from preprocess import compact_blocks, language_confidence
+from report import CVReport, REPORT_RESPONSE_FORMAT
+from matcher import match
+import clients
+import metrics
+import storage
+from storage import bytes_digest, file_digest, text_cache
 
 load_dotenv()
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 SECTION_KEYS = {
     "summary/profile": "sum",
@@ -21,15 +36,6 @@ SECTION_KEYS = {
 
 SECTION_LABELS = {v: k.title() for k, v in SECTION_KEYS.items()}
 
-def detect_language(text: str) -> str:
-    if not text:
-        return "en"
-    cyr = len(re.findall(r"[А-Яа-яЁёІіЇїЄєҐґ]", text))
-    lat = len(re.findall(r"[A-Za-z]", text))
-    if re.search(r"[ІіЇїЄєҐґ]", text):
-        return "uk"
-    return "uk" if cyr > lat else "en"
-
 def market_and_style(lang: str):
     if lang == "uk":
         return (
@@ -53,27 +59,50 @@ def market_and_style(lang: str):
             "Respond in English (UK).",
         )
 
-def extract_text_from_file(file_path):
-    ext = file_path.lower()
-    if ext.endswith(".pdf"):
-        with fitz.open(file_path) as doc:
-            return "\n".join([page.get_text() for page in doc])
-    elif ext.endswith(".docx"):
-        try:
-            from docx import Document
-            doc = Document(file_path)
-            return "\n".join([p.text for p in doc.paragraphs])
-        except Exception as e:
-            return f"[❌ Error reading DOCX file: {e}]"
-    else:
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception as e:
-            return f"[❌ Error reading TXT file: {e}]"
-
-def safe_take(s: str, max_chars: int = 120_000) -> str:
-    return s if len(s) <= max_chars else s[:max_chars] + "\n\n[...truncated for processing...]"
+def safe_take_blocks(blocks: list, max_chars: int = 120_000) -> list:
+    total = 0
+    for i, block in enumerate(blocks):
+        total += len(block.text) + 1
+        if total > max_chars:
+            logging.info(f"CV truncated for processing after {i} of {len(blocks)} blocks")
+            return blocks[:i]
+    return blocks
+
+def _source_digest(source) -> str:
+    if isinstance(source, Upload):
+        return bytes_digest(source.data) if source.data is not None else file_digest(source.path)
+    return file_digest(source)
+
+async def load_resume(file_path):
+    """
+    Returns (content, lang) for an uploaded CV, reusing earlier results for identical file bytes.
+    file_path may also be an extractors.Upload held in memory.
+    Raises ExtractionError (the message is meant for the user) when the CV has no readable text,
+    so nothing is sent to GPT for it.
+    """
+    digest = await asyncio.to_thread(_source_digest, file_path)
+    key = f"{digest}-p{EXTRACT_MAX_PAGES}-t{CV_TOKEN_BUDGET}-x{EXTRACT_VERSION}"
+    cached = await asyncio.to_thread(text_cache.get, key)
+    if cached:
+        return cached["content"], cached["lang"]
+
+    with metrics.span("extract"):
+        blocks = safe_take_blocks(await extract_blocks_async(file_path))
+
+    with metrics.span("compact"):
+        content, stats = await asyncio.to_thread(compact_blocks, blocks)
+    logging.info(
+        f"CV compacted: {stats['tokens_before']} → {stats['tokens_after']} tokens "
+        f"({stats['tokens_saved']} saved, dropped: {', '.join(stats['dropped']) or 'nothing'})"
+    )
+    if not content:
+        raise ExtractionError("[❌ No text found in the file. Please send a PDF, DOCX or TXT with your CV]")
+    lang, confidence = language_confidence(content)
+    if confidence < 0.6:
+        logging.info(f"Mixed-script CV, treated as {lang} (confidence {confidence:.2f})")
+    await asyncio.to_thread(text_cache.put, key, {"content": content, "lang": lang})
+    logging.info(f"Text cache: {text_cache.stats()}")
+    return content, lang
 
 def universal_uk_warning(lang: str) -> str:
     if lang == "en":
@@ -83,36 +112,135 @@ def universal_uk_warning(lang: str) -> str:
         )
     return ""
 
-async def _ask_gpt(prompt: str) -> str:
-    resp = await client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
+_usage = contextvars.ContextVar("llm_usage", default=None)
+
+@contextmanager
+def track_usage():
+    """
+    Collects API calls and token counts made inside the block (including tasks it gathers).
+    """
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    token = _usage.set(totals)
+    try:
+        yield totals
+    finally:
+        _usage.reset(token)
+
+def _record_usage(usage):
+    totals = _usage.get()
+    metrics.record_tokens(getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+    if totals is None:
+        return
+    totals["calls"] += 1
+    if usage is not None:
+        totals["prompt_tokens"] += usage.prompt_tokens or 0
+        totals["completion_tokens"] += usage.completion_tokens or 0
+
+async def _ask_gpt(prompt: str, on_delta=None, **extra_params) -> str:
+    """
+    on_delta — optional coroutine called with the text received so far while the reply streams in.
+    extra_params (response_format, max_tokens, ...) are passed to the API and are part of the cache key.
+    """
+    params = {"model": OPENAI_MODEL, "temperature": OPENAI_TEMPERATURE, **extra_params}
+    cache = storage.response_cache
+    key = cache.make_key(prompt, **params) if cache is not None else None
+    if key:
+        cached = cache.get(key)
+        if cached is not None:
+            if on_delta:
+                await on_delta(cached)
+            return cached
+
+    messages = [{"role": "user", "content": prompt}]
+    with metrics.span("llm"):
+        if on_delta and STREAM_RESPONSES:
+            text = await _stream_gpt(messages, params, on_delta)
+        else:
+            resp = await clients.get_openai().chat.completions.create(messages=messages, **params)
+            _record_usage(resp.usage)
+            text = resp.choices[0].message.content.strip() if resp.choices else ""
+    if not text:
+        return "❌ GPT did not return a valid response."
+    if key:
+        cache.put(key, text)
+    return text
+
+async def _stream_gpt(messages, params, on_delta) -> str:
+    stream = await clients.get_openai().chat.completions.create(
+        messages=messages, stream=True, stream_options={"include_usage": True}, **params
     )
-    return resp.choices[0].message.content.strip() if resp.choices else "❌ GPT did not return a valid response."
-
-def generate_pdf_report(text: str, output_path: str):
-    styles = getSampleStyleSheet()
-    story = []
-    for part in text.split("\n\n"):
-        story.append(Paragraph(part.strip().replace("\n", "<br/>"), styles["Normal"]))
-        story.append(Spacer(1, 12))
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
-    doc.build(story)
-    return output_path
-
-def build_output_path(user_id: str, prefix: str = "report") -> str:
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return f"results/{user_id}/{prefix}_{ts}.pdf"
-
-def _build_full_prompt(content: str, market_note: str, style_note: str, reply_lang: str) -> str:
-    return f"""
-You are a professional career consultant with 10+ years of experience in HR and CV coaching.
-{market_note}
-{style_note}
-{reply_lang}
+    parts = []
+    usage = None
+    start = time.perf_counter()
+    async for chunk in stream:
+        if chunk.usage:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            if not parts:
+                metrics.first_token_seconds.observe(time.perf_counter() - start, mode=metrics.current_mode())
+            parts.append(chunk.choices[0].delta.content)
+            await on_delta("".join(parts))
+    _record_usage(usage)
+    return "".join(parts).strip()
+
+STRUCTURED_TASKS = {
+    "resume": (
+        "Analyze the resume as if the candidate is applying for a modern, competitive role. "
+        "For every section give concrete feedback (use metrics wherever possible) and an improved wording "
+        "the candidate can copy."
+    ),
+    "vacancy": (
+        "Compare the resume to the job vacancy. Per section, name alignment and gaps and rewrite "
+        "the content so the CV better matches the job. Recommendations should increase alignment."
+    ),
+    "consult": (
+        "Give a brief HR-style critique: what is strong, what is missing, formatting and clarity issues. "
+        "Keep feedback short; rewrites only where they add value."
+    ),
+    "step": "Review the resume section by section. Keep each feedback to 2–4 sentences.",
+}
+
+STRUCTURED_FORMAT = """
+Return JSON only. Sections use keys: sum (Summary/Profile), skills (Skills & Qualifications), exp (Experience),
+edu (Education), fmt (Formatting & ATS). Score each section 1–10, overall_score is 0–100,
+summary is a 1–2 sentence overall impression, recommendations are 3–5 actions for the lowest scoring areas.
+Use an empty string for rewrite when none is needed.
+
+Resume:
+"""
+
+def _build_structured_prompt(mode: str, content: str, lang: str, vacancy_text: str = None) -> str:
+    vacancy = f"\n---\nJob Vacancy:\n{vacancy_text}\n" if vacancy_text else ""
+    return f"{prompt_prefix(f'structured:{mode}', lang)}{content}\n{vacancy}"
+
+async def _ask_report(mode: str, content: str, lang: str, vacancy_text: str = None):
+    """
+    Structured-output request. Returns a CVReport, or None if the reply did not match the schema.
+    """
+    with metrics.span("prompt"):
+        prompt = _build_structured_prompt(mode, content, lang, vacancy_text)
+    raw = await _ask_gpt(prompt, response_format=REPORT_RESPONSE_FORMAT, max_tokens=STRUCTURED_MAX_TOKENS)
+    try:
+        with metrics.span("parse"):
+            return CVReport.from_json(raw)
+    except ValueError as e:
+        logging.warning(f"Structured {mode} report rejected, falling back to text mode: {e}")
+        return None
+
+def with_warning(text: str, warning: str) -> str:
+    return f"{warning}\n\n{text}" if warning else text
+
+async def render_report_pdf(text: str, report_data: dict = None) -> bytes:
+    """
+    PDF for the "Download PDF version" button: the HTML report when the reply had a score
+    breakdown, the plain-text layout otherwise (cover letters, step-by-step review).
+    """
+    with metrics.span("render"):
+        if report_data and report_data.get("sections"):
+            return await render(report_data)
+        return await render_text(text)
 
+FULL_REVIEW_TASK = """
 Analyze the following resume as if the candidate is applying for a modern, competitive role.
 Your tasks:
 
@@ -145,47 +273,36 @@ Your tasks:
 7) Based on lowest scoring areas, provide 3–5 actionable recommendations.
 
 Resume:
-{content}
 """
 
-async def analyze_resume(file_path):
-    content = safe_take(extract_text_from_file(file_path))
-    lang = detect_language(content)
-    market_note, style_note, reply_lang = market_and_style(lang)
+def _build_full_prompt(content: str, lang: str) -> str:
+    return f"{prompt_prefix('resume', lang)}{content}\n"
+
+async def analyze_resume(file_path, on_delta=None):
+    content, lang = await load_resume(file_path)
     proactive_warning = universal_uk_warning(lang)
 
-    prompt = _build_full_prompt(content, market_note, style_note, reply_lang)
-    gpt_response = await _ask_gpt(prompt)
-    full_response = f"{proactive_warning}\n\n{gpt_response}" if proactive_warning else gpt_response
+    if STRUCTURED_OUTPUT:
+        report = await _ask_report("resume", content, lang)
+        if report:
+            return with_warning(report.to_text(), proactive_warning), report.as_dict()
 
-    # 🧠 Розбір GPT-відповіді
-    user_data = parse_gpt_output(full_response)
+    with metrics.span("prompt"):
+        prompt = _build_full_prompt(content, lang)
+    gpt_response = await _ask_gpt(prompt, on_delta)
+    full_response = with_warning(gpt_response, proactive_warning)
 
-    # 📄 Створення PDF
-    output_path = build_output_path("user", "cv_analysis")
-    render_html_to_pdf(user_data, output_path)
-    html_out = template.render(data=user_data, now=datetime.now())
-    return full_response, output_path
+    # 🧠 Розбір GPT-відповіді; PDF створюється лише на запит (render_report_pdf)
+    return full_response, parse_gpt_output(full_response)
 
 
 # Інші функції (analyze_for_vacancy, give_hr_feedback, generate_cover_letter, step_by_step_review) додаються за потреби.
 
 
-async def analyze_for_vacancy(resume_path, vacancy_text):
-    resume_content = safe_take(extract_text_from_file(resume_path))
-    lang = detect_language(resume_content)
-    market_note, style_note, reply_lang = market_and_style(lang)
-    proactive_warning = universal_uk_warning(lang)
-
-    prompt = f"""
-You are a senior HR consultant and career advisor with expertise in aligning CVs to job roles.
-{market_note}
-{style_note}
-{reply_lang}
-
+VACANCY_TASK = """
 Task:
 - Compare the following resume to the job vacancy.
-- Identify alignment and gaps.
+- Identify alignment and gaps. A local pre-analysis is given below the vacancy: build on it instead of re-listing skills.
 - Recommend edits to make the CV a better match (especially in skills and experience).
 - Rephrase or add bullet points to fit the job.
 - Evaluate formatting and language alignment with market expectations.
@@ -204,30 +321,31 @@ Task:
 
 ---
 Resume:
-{resume_content}
-
----
-Job Vacancy:
-{vacancy_text}
 """
-    response = await _ask_gpt(prompt)
-    full_response = f"{proactive_warning}\n\n{response}" if proactive_warning else response
-    output_path = build_output_path("user", "cv_match")
-    generate_pdf_report(full_response, output_path)
-    return full_response, output_path
-
-async def give_hr_feedback(resume_path):
-    content = safe_take(extract_text_from_file(resume_path))
-    lang = detect_language(content)
-    market_note, style_note, reply_lang = market_and_style(lang)
-    proactive_warning = universal_uk_warning(lang)
 
-    prompt = f"""
-You are a professional career coach helping job seekers improve their CVs.
-{market_note}
-{style_note}
-{reply_lang}
+async def analyze_for_vacancy(resume_path, vacancy_text, on_delta=None, match_result=None):
+    """match_result — a matcher.MatchResult already computed for the preview; computed here otherwise."""
+    resume_content, lang = await load_resume(resume_path)
+    proactive_warning = universal_uk_warning(lang)
+    if match_result is None:
+        with metrics.span("match"):
+            match_result = await asyncio.to_thread(match, resume_content, vacancy_text)
+
+    if STRUCTURED_OUTPUT:
+        report = await _ask_report("vacancy", resume_content, lang, f"{vacancy_text}\n\n{match_result.prompt_note()}")
+        if report:
+            return with_warning(report.to_text(), proactive_warning), report.as_dict()
+
+    with metrics.span("prompt"):
+        prompt = (
+            f"{prompt_prefix('vacancy', lang)}{resume_content}\n\n---\n"
+            f"Job Vacancy:\n{vacancy_text}\n\n---\n{match_result.prompt_note()}\n"
+        )
+    response = await _ask_gpt(prompt, on_delta)
+    full_response = with_warning(response, proactive_warning)
+    return full_response, parse_gpt_output(full_response)
 
+CONSULT_TASK = """
 Provide a brief but focused HR-style critique of this CV:
 - What is strong?
 - What is missing?
@@ -247,16 +365,24 @@ Rate the resume using:
 📌 List 3–5 practical improvement tips.
 
 Resume:
-{content}
 """
-    response = await _ask_gpt(prompt)
-    full_response = f"{proactive_warning}\n\n{response}" if proactive_warning else response
-    output_path = build_output_path("user", "hr_feedback")
-    generate_pdf_report(full_response, output_path)
-    return full_response, output_path
 
-async def generate_cover_letter(vacancy_text, resume_text):
-    prompt = f"""
+async def give_hr_feedback(resume_path, on_delta=None):
+    content, lang = await load_resume(resume_path)
+    proactive_warning = universal_uk_warning(lang)
+
+    if STRUCTURED_OUTPUT:
+        report = await _ask_report("consult", content, lang)
+        if report:
+            return with_warning(report.to_text(), proactive_warning), report.as_dict()
+
+    with metrics.span("prompt"):
+        prompt = f"{prompt_prefix('consult', lang)}{content}\n"
+    response = await _ask_gpt(prompt, on_delta)
+    full_response = with_warning(response, proactive_warning)
+    return full_response, parse_gpt_output(full_response)
+
+COVER_LETTER_PREFIX = """
 You are an experienced UK-based hiring manager helping candidates generate strong, personalised cover letters.
 Match the applicant's CV to the vacancy and write a professional, persuasive letter that:
 - Starts with a strong opening
@@ -267,28 +393,40 @@ Write in British English and keep it to 3 paragraphs.
 
 ---
 Job Vacancy:
-{vacancy_text}
-
----
-Resume:
-{resume_text}
 """
-    response = await _ask_gpt(prompt)
-    output_path = build_output_path("user", "cover_letter")
-    generate_pdf_report(response, output_path)
-    return response, output_path
 
-async def step_by_step_review(file_path):
-    content = safe_take(extract_text_from_file(file_path))
-    lang = detect_language(content)
-    market_note, style_note, reply_lang = market_and_style(lang)
+async def generate_cover_letter(vacancy_text, resume_text, on_delta=None):
+    with metrics.span("prompt"):
+        prompt = f"{COVER_LETTER_PREFIX}{vacancy_text}\n\n---\nResume:\n{resume_text}\n"
+    response = await _ask_gpt(prompt, on_delta)
+    return response, None
 
-    prompt = f"""
-You are a professional CV coach.
-{market_note}
-{style_note}
-{reply_lang}
+SCREEN_SCORE_RE = re.compile(r"Match:\s*(\d{1,3})\s*/\s*100", re.I)
+SCREEN_PREFIX = """
+You are a recruiter screening many CVs for the job vacancy below.
+Rate how well the resume matches the vacancy, then explain in 2–3 sentences: main strengths and main gaps.
+Answer in English. The first line must be exactly: Match: XX / 100
 
+---
+Job Vacancy:
+"""
+
+async def screen_resume(resume_content: str, vacancy_text: str, note: str = "") -> tuple:
+    """
+    Short verdict for batch screening: (match score 0–100 or None, verdict text).
+    The vacancy comes first so every call in a batch shares the same prompt prefix;
+    note is the CV's matcher.MatchResult.prompt_note().
+    """
+    with metrics.span("prompt"):
+        prompt = f"{SCREEN_PREFIX}{vacancy_text}\n\n---\nResume:\n{resume_content}\n\n{note}\n"
+    response = await _ask_gpt(prompt, max_tokens=300)
+    match = SCREEN_SCORE_RE.search(response)
+    if not match:
+        return None, response.strip()
+    verdict = (response[:match.start()] + response[match.end():]).strip()
+    return min(int(match.group(1)), 100), verdict
+
+STEP_TASK = """
 Do a **step-by-step** interactive CV review. After each section:
 - Give short feedback.
 - Use this wording: \n\n\"Would you like to edit this section now?\"
@@ -306,8 +444,18 @@ Important:
 - Use Markdown formatting for headings and bullet points.
 
 Resume:
-{content}
 """
+
+async def step_by_step_review(file_path):
+    content, lang = await load_resume(file_path)
+
+    if STRUCTURED_OUTPUT:
+        report = await _ask_report("step", content, lang)
+        if report:
+            return report.step_sections(), report.to_text()
+
+    with metrics.span("prompt"):
+        prompt = f"{prompt_prefix('step', lang)}{content}\n"
     response = await _ask_gpt(prompt)
     sections = response.split("\n\n")
 
@@ -318,9 +466,107 @@ Resume:
         if key:
             parsed_sections.append((key, header.title(), block.strip()))
 
-    output_path = build_output_path("user", "step_by_step")
-    generate_pdf_report(response, output_path)
-    return parsed_sections, output_path
+    return parsed_sections, response
+
+STEP_ORDER = list(SECTION_LABELS)
+
+SECTION_TASK = """
+Review only the resume section named after the resume.
+- Start with that section's heading.
+- Give short, specific feedback as bullet points and one improved wording the candidate can copy.
+- If the resume has no such section, say so and suggest what to add.
+- End with a line: Score: X / 10
+- Use Markdown formatting for headings and bullet points.
+
+Resume:
+"""
+
+async def review_section(content: str, lang: str, key: str, on_delta=None) -> str:
+    """
+    One section of the incremental step-by-step review; content/lang come from load_resume.
+    The section name follows the resume, so the five calls for one CV share their prompt prefix.
+    """
+    with metrics.span("prompt"):
+        prompt = f"{prompt_prefix('section', lang)}{content}\n\nSection to review: **{SECTION_LABELS[key]}**\n"
+    return await _ask_gpt(prompt, on_delta=on_delta)
+
+def cached_section_rewrite(user_id, key: str, revised_text: str):
+    """This user's earlier rescore_section reply for an equivalent revision (see storage.SectionCache), or None."""
+    cache = storage.section_cache
+    if cache is None:
+        return None
+    reply, result = cache.lookup(user_id, key, revised_text)
+    metrics.section_cache_lookups.inc(result=result)
+    if reply is not None:
+        logging.info(f"Section cache {result} hit: {cache.stats()}")
+    return reply
+
+async def rescore_section(user_id, key: str, revised_text: str, on_delta=None) -> str:
+    """Polishes the user's revision of one section and scores only that section."""
+    prompt = edit_section(SECTION_LABELS.get(key, key), revised_text) + (
+        "\n\nAfter the rewritten text, add one last line rating it: Score: X / 10"
+    )
+    reply = await _ask_gpt(prompt, on_delta=on_delta)
+    if storage.section_cache is not None and not reply.startswith("❌"):
+        storage.section_cache.put(user_id, key, revised_text, reply)
+    return reply
+
+CONSULTANT = "You are a professional career consultant with 10+ years of experience in HR and CV coaching."
+CV_COACH = "You are a professional CV coach."
+
+# mode -> (persona, task); the task ends where the per-request text (the resume) starts.
+PROMPT_TEMPLATES = {
+    "resume": (CONSULTANT, FULL_REVIEW_TASK),
+    "vacancy": ("You are a senior HR consultant and career advisor with expertise in aligning CVs to job roles.", VACANCY_TASK),
+    "consult": ("You are a professional career coach helping job seekers improve their CVs.", CONSULT_TASK),
+    "step": (CV_COACH, STEP_TASK),
+    "section": (CV_COACH, SECTION_TASK),
+    **{f"structured:{mode}": (CONSULTANT, f"\n{task}{STRUCTURED_FORMAT}") for mode, task in STRUCTURED_TASKS.items()},
+}
+
+def _compile_prefix(persona: str, task: str, lang: str) -> str:
+    market_note, style_note, reply_lang = market_and_style(lang)
+    return f"\n{persona}\n{market_note}\n{style_note}\n{reply_lang}\n{task}"
+
+# Built once: requests only append their own text, and the unchanged prefix lets the
+# provider's prompt caching reuse it across users.
+PROMPT_PREFIXES = {
+    (mode, lang): _compile_prefix(persona, task, lang)
+    for mode, (persona, task) in PROMPT_TEMPLATES.items()
+    for lang in ("en", "uk")
+}
+
+def prompt_prefix(mode: str, lang: str) -> str:
+    return PROMPT_PREFIXES[(mode, "uk" if lang == "uk" else "en")]
+
+async def full_report(file_path, merged: bool = False):
+    """
+    CV analysis, HR feedback and step-by-step review from one extraction.
+
+    merged=False runs the three prompts concurrently; merged=True (structured mode only)
+    asks for a single structured report and derives all three views from it.
+    Returns {"analysis": (text, data), "hr": (text, data), "step": (sections, text)}.
+    """
+    content, lang = await load_resume(file_path)
+
+    if merged and STRUCTURED_OUTPUT:
+        report = await _ask_report("resume", content, lang)
+        if report:
+            warning = universal_uk_warning(lang)
+            hr_text = f"{report.summary}\n\n📌 Recommendations:\n" + "\n".join(f"• {r}" for r in report.recommendations)
+            return {
+                "analysis": (with_warning(report.to_text(), warning), report.as_dict()),
+                "hr": (with_warning(hr_text, warning), report.as_dict()),
+                "step": (report.step_sections(), report.to_text()),
+            }
+
+    # load_resume above leaves the text in the memory cache, so these do not re-extract.
+    analysis, hr, step = await asyncio.gather(
+        analyze_resume(file_path),
+        give_hr_feedback(file_path),
+        step_by_step_review(file_path),
+    )
+    return {"analysis": analysis, "hr": hr, "step": step}
 
 def edit_section(section_name: str, current_text: str) -> str:
     prompt = (
@@ -328,9 +574,8 @@ def edit_section(section_name: str, current_text: str) -> str:
         f"Only rewrite the text, do not return explanations.\n\nSection: {section_name}\n\n{current_text}"
     )
     return prompt
-import os
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
+
+@metrics.timed("parse")
 def parse_gpt_output(gpt_text: str) -> dict:
     """
     Парсить текстову відповідь GPT у формат user_data для HTML-шаблону.
@@ -391,32 +636,3 @@ def parse_gpt_output(gpt_text: str) -> dict:
             section["feedback"] = "\n".join(buffer[i*chunk_size:(i+1)*chunk_size]).strip()
 
     return data
-
-
-def render_html_to_pdf(user_data: dict, output_path: str):
-    """
-    user_data = {
-        'name': 'John Doe',
-        'summary': 'Experienced Project Manager...',
-        'sections': [
-            {'title': 'Summary/Profile', 'score': 7, 'feedback': 'Try to personalize...'},
-            {'title': 'Skills & Qualifications', 'score': 8, 'feedback': 'Strong technical skills...'},
-            {'title': 'Experience', 'score': 6, 'feedback': 'Quantify your achievements...'},
-            {'title': 'Education', 'score': 9, 'feedback': 'Well-detailed and relevant.'},
-            {'title': 'Formatting & ATS', 'score': 5, 'feedback': 'Avoid tables and columns...'}
-        ],
-        'overall_score': 70,
-        'recommendations': [
-            'Use action verbs.',
-            'Include metrics in experience.',
-            'Tailor the CV for each application.'
-        ]
-    }
-    """
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("report_template.html")
-    html_out = template.render(data=user_data, now=datetime.now())
-
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    HTML(string=html_out).write_pdf(output_path)
-    return output_path
\ No newline at end of file
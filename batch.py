@@ -0,0 +1,223 @@
+"""
+Batch screening: rank many CVs against one vacancy.
+
+    python batch.py vacancy.pdf cvs/ --top-k 20 --csv ranking.csv --pdf ranking.pdf
+    python batch.py vacancy.txt cvs.zip
+
+CVs are extracted in parallel and pre-scored locally with matcher.MatchIndex (skill coverage
+and TF-IDF similarity to the vacancy, no LLM call). Only the top-K go to GPT, BATCH_CONCURRENCY
+at a time through the shared scheduler, for a short verdict; nothing is rendered per CV.
+The result is one ranked CSV and one PDF summary.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import logging
+import os
+import zipfile
+from dataclasses import dataclass, field
+
+from config import (
+    EXTRACT_WORKERS,
+    BATCH_TOP_K,
+    BATCH_CONCURRENCY,
+    BATCH_MAX_FILES,
+    BATCH_MAX_UNZIPPED_MB,
+)
+from extractors import ExtractionError, Upload
+from matcher import MatchIndex
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+@dataclass
+class Candidate:
+    name: str
+    content: str = ""
+    lang: str = "en"
+    prescore: float = 0.0  # matcher score, 0–1
+    matched: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+    note: str = ""  # matcher summary passed to the GPT prompt
+    llm_score: int = None
+    verdict: str = ""
+    error: str = ""
+
+    def rank_key(self) -> tuple:
+        # GPT-reviewed CVs first (by their match score), then the rest by pre-score; unreadable files last.
+        return (not self.error, self.llm_score is not None, self.llm_score or 0, self.prescore)
+
+
+def read_zip(source, max_files: int = BATCH_MAX_FILES, max_bytes: int = BATCH_MAX_UNZIPPED_MB * 1024 * 1024) -> list:
+    """CVs inside a ZIP archive (an Upload, a path or bytes) as in-memory Uploads."""
+    if isinstance(source, Upload):
+        source = source.data if source.data is not None else source.path
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and not os.path.basename(info.filename).startswith(".")
+            and "__MACOSX" not in info.filename
+            and info.filename.lower().endswith(SUPPORTED_EXTENSIONS)
+        ]
+        if len(entries) > max_files:
+            raise ValueError(f"The archive has {len(entries)} CVs; the limit is {max_files}")
+        if sum(info.file_size for info in entries) > max_bytes:
+            raise ValueError(f"The archive unpacks to more than {max_bytes // (1024 * 1024)} MB")
+        return [Upload(file_name=os.path.basename(info.filename), data=archive.read(info)) for info in entries]
+
+
+def read_folder(path: str, max_files: int = BATCH_MAX_FILES) -> list:
+    names = sorted(n for n in os.listdir(path) if n.lower().endswith(SUPPORTED_EXTENSIONS))
+    if len(names) > max_files:
+        raise ValueError(f"The folder has {len(names)} CVs; the limit is {max_files}")
+    return [os.path.join(path, n) for n in names]
+
+
+def _source_name(source) -> str:
+    return source.file_name if isinstance(source, Upload) else os.path.basename(source)
+
+
+async def screen(sources: list, vacancy_text: str, top_k: int = BATCH_TOP_K, concurrency: int = BATCH_CONCURRENCY,
+                 owner="cli", on_progress=None) -> list:
+    """
+    Ranks CVs (Uploads or paths) against vacancy_text and returns the Candidates best first.
+    on_progress — optional coroutine called with a short status line after each stage.
+    """
+    from analyzer import load_resume, screen_resume
+    from scheduler import scheduler
+
+    async def progress(text: str):
+        logging.info(f"Batch {owner}: {text}")
+        if on_progress:
+            await on_progress(text)
+
+    # Keep the extraction queue short: the extraction timeout also counts time spent waiting for a worker.
+    extract_slots = asyncio.Semaphore(EXTRACT_WORKERS * 2)
+
+    async def extract(source) -> Candidate:
+        candidate = Candidate(name=_source_name(source))
+        async with extract_slots:
+            try:
+                candidate.content, candidate.lang = await load_resume(source)
+            except Exception as e:  # ExtractionError carries the "[❌ ...]" message as is
+                candidate.error = str(e)
+        return candidate
+
+    candidates = await asyncio.gather(*(extract(source) for source in sources))
+    readable = [c for c in candidates if not c.error]
+    await progress(f"Extracted {len(readable)} of {len(candidates)} CVs")
+
+    def prescore():
+        index = MatchIndex(vacancy_text, [c.content for c in readable])
+        for i, candidate in enumerate(readable):
+            result = index.score(i, candidate.content)
+            candidate.prescore = result.score / 100
+            candidate.matched = result.matched_skills
+            candidate.missing = result.missing_skills + result.missing_keywords
+            candidate.note = result.prompt_note()
+
+    await asyncio.to_thread(prescore)
+    shortlist = sorted(readable, key=lambda c: c.prescore, reverse=True)[:top_k]
+    await progress(f"Pre-scored locally; sending the top {len(shortlist)} to GPT")
+
+    async def review(slot: int, candidate: Candidate):
+        # One scheduler queue per slot: at most `concurrency` calls in flight for this batch,
+        # and the global LLM cap and retries still apply.
+        try:
+            candidate.llm_score, candidate.verdict = await scheduler.submit(
+                ("batch", owner, slot), lambda: screen_resume(candidate.content, vacancy_text, candidate.note)
+            )
+        except Exception as e:
+            candidate.verdict = f"[❌ GPT review failed: {e}]"
+
+    await asyncio.gather(*(review(i % max(concurrency, 1), c) for i, c in enumerate(shortlist)))
+    await progress(f"Reviewed {len(shortlist)} CVs")
+    return sorted(candidates, key=Candidate.rank_key, reverse=True)
+
+
+CSV_FIELDS = ("rank", "file", "match_score", "local_score", "matched", "missing", "verdict", "error")
+
+
+def to_csv(candidates: list, max_keywords: int = 15) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    for rank, c in enumerate(candidates, 1):
+        writer.writerow([
+            rank, c.name, "" if c.llm_score is None else c.llm_score, f"{c.prescore * 100:.0f}",
+            ", ".join(c.matched[:max_keywords]), ", ".join(c.missing[:max_keywords]), c.verdict, c.error,
+        ])
+    return buffer.getvalue().encode("utf-8-sig")  # BOM so Excel opens Cyrillic names correctly
+
+
+def to_text(candidates: list, vacancy_text: str = "", limit: int = None) -> str:
+    reviewed = sum(c.llm_score is not None for c in candidates)
+    lines = [f"📋 Batch screening: {len(candidates)} CVs, {reviewed} reviewed by GPT", ""]
+    if vacancy_text:
+        lines += [f"Vacancy: {vacancy_text.strip().splitlines()[0][:200]}", ""]
+    for rank, c in enumerate(candidates[:limit], 1):
+        if c.error:
+            lines.append(f"{rank}. {c.name} — could not be read: {c.error}")
+            continue
+        score = f"match {c.llm_score}/100, " if c.llm_score is not None else ""
+        lines.append(f"{rank}. {c.name} — {score}local {c.prescore * 100:.0f}/100")
+        if c.verdict:
+            lines.append(f"   {c.verdict}")
+        if c.missing and c.llm_score is not None:
+            lines.append(f"   Missing: {', '.join(c.missing[:10])}")
+    return "\n".join(lines)
+
+
+async def to_pdf(candidates: list, vacancy_text: str = "") -> bytes:
+    from renderer import render_text
+
+    return await render_text(to_text(candidates, vacancy_text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank a folder or ZIP of CVs against one vacancy.")
+    parser.add_argument("vacancy", help="vacancy file (PDF, DOCX or TXT)")
+    parser.add_argument("cvs", help="folder or .zip with the CVs")
+    parser.add_argument("--top-k", type=int, default=BATCH_TOP_K)
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--csv", default="ranking.csv")
+    parser.add_argument("--pdf", default="ranking.pdf")
+    args = parser.parse_args()
+
+    import clients
+    import renderer
+    from extractors import extract_blocks_async, shutdown_pool
+    from preprocess import render_blocks
+
+    sources = read_zip(args.cvs) if args.cvs.lower().endswith(".zip") else read_folder(args.cvs)
+
+    async def run():
+        try:
+            vacancy_text = render_blocks(await extract_blocks_async(args.vacancy))
+        except ExtractionError as e:
+            raise SystemExit(f"Could not read the vacancy: {e}")
+        try:
+            candidates = await screen(sources, vacancy_text, top_k=args.top_k, concurrency=args.concurrency)
+            return candidates, await to_pdf(candidates, vacancy_text)
+        finally:
+            await clients.close()
+
+    try:
+        candidates, pdf = asyncio.run(run())
+    finally:
+        shutdown_pool()
+        renderer.shutdown_pool()
+    with open(args.csv, "wb") as f:
+        f.write(to_csv(candidates))
+    renderer.write_pdf(pdf, args.pdf)
+    print(to_text(candidates, limit=10))
+    print(f"Saved {args.csv} and {args.pdf}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,87 @@
+"""
+Bytes produced and time per export format, next to the two PDF renderers.
+
+    python -m benchmarks.bench_export --reports 200
+
+Each format exports a typical report and a long one (20x the feedback) --repeats times in this
+process; the fastest run counts. The batch line is the time to export --reports typical reports,
+e.g. for a large batch export.
+"""
+import argparse
+import io
+import time
+
+import exporter
+import renderer
+from benchmarks.corpus import CYRILLIC_PARAGRAPH, LATIN_PARAGRAPH
+
+SECTION_TITLES = ("Summary/Profile", "Skills & Qualifications", "Experience", "Education", "Formatting & ATS")
+
+
+def make_report(scale: int = 1) -> tuple:
+    """(report data, reply text) shaped like CVReport.as_dict() and its to_text()."""
+    feedback = " ".join([LATIN_PARAGRAPH, CYRILLIC_PARAGRAPH] * scale)
+    data = {
+        "name": "John Smith",
+        "summary": LATIN_PARAGRAPH,
+        "sections": [
+            {"key": key, "title": title, "score": 5 + i, "feedback": feedback, "rewrite": LATIN_PARAGRAPH}
+            for i, (key, title) in enumerate(zip(("sum", "skills", "exp", "edu", "fmt"), SECTION_TITLES))
+        ],
+        "overall_score": 70,
+        "recommendations": ["Use action verbs.", "Quantify achievements.", "Tailor the CV to each vacancy."],
+    }
+    text = "\n\n".join([data["summary"], *(f"**{s['title']}** ({s['score']}/10)\n{s['feedback']}" for s in data["sections"])])
+    return data, text
+
+
+def _pdf_html(data, text) -> bytes:
+    return renderer.render_html_pdf_bytes(data)
+
+
+def _pdf_text(data, text) -> bytes:
+    return renderer.render_text_pdf_bytes(text)
+
+
+def _export(fmt):
+    return lambda data, text: exporter.export(fmt, data, text).getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--reports", type=int, default=200, help="reports in the batch timing")
+    args = parser.parse_args()
+
+    formats = {fmt: _export(fmt) for fmt in exporter.FORMATS}
+    formats["pdf (text)"] = _pdf_text
+    formats["pdf (html)"] = _pdf_html
+    reports = {"typical": make_report(1), "long": make_report(20)}
+
+    for name, func in formats.items():
+        try:
+            func(*reports["typical"])  # warm up imports and template caches
+        except (ImportError, OSError) as e:
+            print(f"{name:>10}: skipped ({e})")
+            continue
+        line = []
+        for size, (data, text) in reports.items():
+            best, output = float("inf"), b""
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                output = func(data, text)
+                best = min(best, time.perf_counter() - start)
+            line.append(f"{size} {len(output) / 1024:7.1f} KB in {best * 1000:7.2f} ms")
+
+        sink = io.BytesIO()
+        data, text = reports["typical"]
+        start = time.perf_counter()
+        for _ in range(args.reports):
+            sink.write(func(data, text))
+        batch = time.perf_counter() - start
+        line.append(f"batch of {args.reports}: {batch * 1000:8.1f} ms, {sink.tell() / 1024 / 1024:.1f} MB")
+        print(f"{name:>10}: " + " | ".join(line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Event-loop stall and extraction throughput under concurrent uploads.
+
+    python -m benchmarks.bench_extraction --files 16 --pages 30
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import make_pdf
+from extractors import extract_text, extract_text_async, get_pool, shutdown_pool
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Returns the longest delay the loop imposed on a 10 ms sleep."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def _run(paths, use_pool: bool):
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(stop))
+    await asyncio.sleep(0.05)
+
+    async def inline(path):
+        # What the handlers did before: parse right on the event loop.
+        return extract_text(path)
+
+    start = time.perf_counter()
+    extract = extract_text_async if use_pool else inline
+    await asyncio.gather(*(extract(p) for p in paths))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    stall = await beat
+    return elapsed, stall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [make_pdf(os.path.join(tmp, f"cv_{i}.pdf"), pages=args.pages) for i in range(args.files)]
+        # A blank corpus would time the OCR fallback instead of text extraction.
+        chars = len(extract_text(paths[0]).strip())
+        assert chars > 100 * args.pages, f"the benchmark PDF has only {chars} characters of text"
+        get_pool().submit(int).result()  # warm the workers so spawn cost is not measured
+
+        for label, use_pool in (("inline", False), ("pool", True)):
+            elapsed, stall = asyncio.run(_run(paths, use_pool))
+            print(
+                f"{label:>6}: {args.files} files x {args.pages} pages in {elapsed:.2f}s "
+                f"({args.files / elapsed:.1f} files/s), max loop stall {stall * 1000:.0f} ms"
+            )
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Tokens and wall time of the "Full CV report" mode against three sequential runs.
+
+    python -m benchmarks.bench_full_report --latency 2 --jobs 6 [--structured]
+
+Runs against the local fake OpenAI server; token counts are the server's
+chars/4 estimate, so compare modes with each other rather than with real bills.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import SIZES, cv_lines, make_cv_pdf
+from benchmarks.fake_openai import start_fake_openai
+
+
+async def _sequential(analyzer, storage, path):
+    # Before "Full CV report" each mode was a separate upload with its own extraction.
+    for func in (analyzer.analyze_resume, analyzer.give_hr_feedback, analyzer.step_by_step_review):
+        analyzer.text_cache = storage.TextCache(cache_dir=tempfile.mkdtemp())
+        await func(path)
+
+
+async def _measure(label, analyzer, coro):
+    with analyzer.track_usage() as usage:
+        start = time.perf_counter()
+        await coro
+        elapsed = time.perf_counter() - start
+    print(
+        f"{label:>10}: {elapsed:6.2f}s, {usage['calls']} calls, "
+        f"{usage['prompt_tokens']} prompt + {usage['completion_tokens']} completion tokens"
+    )
+    return elapsed, usage
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--jobs", type=int, default=SIZES["typical"], help="positions in the synthetic CV")
+    parser.add_argument("--structured", action="store_true", help="also measure the merged structured call")
+    args = parser.parse_args()
+
+    _, base_url = start_fake_openai(latency=args.latency)
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="fake", STREAM_RESPONSES="0")
+    os.environ["STRUCTURED_OUTPUT"] = "1" if args.structured else "0"
+    import analyzer
+    import storage
+
+    path = make_cv_pdf(os.path.join(tempfile.mkdtemp(), "cv.pdf"), cv_lines("en", args.jobs))
+
+    async def run():
+        base_time, base_usage = await _measure("sequential", analyzer, _sequential(analyzer, storage, path))
+        runs = [("gather", False)] + ([("merged", True)] if args.structured else [])
+        for label, merged in runs:
+            analyzer.text_cache = storage.TextCache(cache_dir=tempfile.mkdtemp())
+            elapsed, usage = await _measure(label, analyzer, analyzer.full_report(path, merged=merged))
+            saved = base_usage["prompt_tokens"] + base_usage["completion_tokens"] - usage["prompt_tokens"] - usage["completion_tokens"]
+            print(f"{'':>10}  saves {base_time - elapsed:.2f}s wall time and {saved} tokens vs sequential")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+End-to-end benchmark of the five analysis modes on the synthetic corpus, against the fake OpenAI server.
+
+    python -m benchmarks.bench_pipeline --latency 0.5 --concurrency 1 4 16 --output results.json
+    python -m benchmarks.bench_pipeline --baseline results.json      # exit 1 on a regression
+
+Every (mode, document) pair runs --repeats times with a cold text cache; the metrics spans
+(extract, compact, prompt, llm, parse) give per-stage p50/p95. Throughput is measured at each
+concurrency level over a mixed workload, and peak RSS is taken for this process and the
+extraction workers. The results are saved as JSON for comparison with a later run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from itertools import cycle, islice
+
+from benchmarks.corpus import VACANCY_TEXT, build_corpus
+from benchmarks.fake_openai import start_fake_openai
+
+MODES = ("resume", "vacancy", "consult", "cover", "step")
+
+
+async def run_mode(analyzer, mode: str, path: str):
+    if mode == "resume":
+        return await analyzer.analyze_resume(path)
+    if mode == "vacancy":
+        return await analyzer.analyze_for_vacancy(path, VACANCY_TEXT)
+    if mode == "consult":
+        return await analyzer.give_hr_feedback(path)
+    if mode == "cover":
+        resume_text, _ = await analyzer.load_resume(path)
+        return await analyzer.generate_cover_letter(VACANCY_TEXT, resume_text)
+    return await analyzer.step_by_step_review(path)
+
+
+def _summary(values: list) -> dict:
+    ordered = sorted(values)
+    return {
+        "n": len(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "max": ordered[-1],
+    }
+
+
+def _peak_rss_mb(who) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+async def measure_stages(analyzer, storage, metrics, corpus: dict, modes, repeats: int) -> tuple:
+    stages = {mode: {} for mode in modes}
+    documents = {}
+    for name, path in corpus.items():
+        documents[name] = {}
+        for mode in modes:
+            totals = []
+            for _ in range(repeats):
+                analyzer.text_cache = storage.TextCache(cache_dir=tempfile.mkdtemp())
+                start = time.perf_counter()
+                with metrics.trace(mode) as trace:
+                    await run_mode(analyzer, mode, path)
+                totals.append(time.perf_counter() - start)
+                for stage, seconds in trace["spans"]:
+                    stages[mode].setdefault(stage, []).append(seconds)
+                stages[mode].setdefault("total", []).append(totals[-1])
+            documents[name][mode] = statistics.median(totals)
+        print(f"{name:>16}: " + ", ".join(f"{mode} {documents[name][mode]:.2f}s" for mode in modes))
+    return {mode: {stage: _summary(v) for stage, v in by_stage.items()} for mode, by_stage in stages.items()}, documents
+
+
+async def measure_throughput(analyzer, storage, corpus: dict, modes, concurrency: int, runs: int) -> dict:
+    # Cold cache per level; the workload cycles through documents, so later runs of a document hit the cache.
+    analyzer.text_cache = storage.TextCache(cache_dir=tempfile.mkdtemp())
+    workload = list(islice(cycle([(mode, path) for path in corpus.values() for mode in modes]), runs))
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(mode, path):
+        async with sem:
+            start = time.perf_counter()
+            await run_mode(analyzer, mode, path)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(mode, path) for mode, path in workload))
+    elapsed = time.perf_counter() - start
+    result = {"runs": runs, "seconds": elapsed, "runs_per_s": runs / elapsed, "latency": _summary(latencies)}
+    print(f"concurrency {concurrency:>3}: {runs} runs in {elapsed:.2f}s — {result['runs_per_s']:.2f} runs/s, "
+          f"p50 {result['latency']['p50']:.2f}s, p95 {result['latency']['p95']:.2f}s")
+    return result
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Stage p50s and throughput that got worse than the baseline by more than threshold (0.2 = 20%)."""
+    regressions = []
+    for mode, stages in current["stages"].items():
+        for stage, now in stages.items():
+            before = baseline.get("stages", {}).get(mode, {}).get(stage)
+            # Sub-millisecond stages are mostly noise.
+            if before and before["p50"] > 0.001 and now["p50"] > before["p50"] * (1 + threshold):
+                regressions.append(f"{mode}/{stage} p50 {before['p50']:.3f}s → {now['p50']:.3f}s")
+    for level, now in current["throughput"].items():
+        before = baseline.get("throughput", {}).get(level)
+        if before and now["runs_per_s"] < before["runs_per_s"] * (1 - threshold):
+            regressions.append(f"throughput @{level} {before['runs_per_s']:.2f} → {now['runs_per_s']:.2f} runs/s")
+    for who, now in current["peak_rss_mb"].items():
+        before = baseline.get("peak_rss_mb", {}).get(who)
+        if before and now > before * (1 + threshold):
+            regressions.append(f"peak RSS ({who}) {before:.0f} → {now:.0f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM seconds per reply")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--sizes", nargs="+", choices=["small", "typical", "long"], default=["small", "typical", "long"])
+    parser.add_argument("--repeats", type=int, default=3, help="cold runs per (mode, document) for stage latency")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--runs", type=int, default=48, help="runs per concurrency level")
+    parser.add_argument("--structured", action="store_true")
+    parser.add_argument("--output", default="bench_pipeline.json")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    _, base_url = start_fake_openai(latency=args.latency)
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="fake", STREAM_RESPONSES="0", LLM_CACHE_ENABLED="0")
+    os.environ["STRUCTURED_OUTPUT"] = "1" if args.structured else "0"
+    import analyzer
+    import extractors
+    import metrics
+    import storage
+
+    corpus = build_corpus(tempfile.mkdtemp(), sizes=args.sizes)
+
+    async def run():
+        stages, documents = await measure_stages(analyzer, storage, metrics, corpus, args.modes, args.repeats)
+        throughput = {}
+        for level in args.concurrency:
+            throughput[str(level)] = await measure_throughput(analyzer, storage, corpus, args.modes, level, args.runs)
+        return stages, documents, throughput
+
+    stages, documents, throughput = asyncio.run(run())
+    extractors.shutdown_pool()  # children only count towards RUSAGE_CHILDREN once they have exited
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "latency": args.latency,
+            "structured": args.structured,
+            "repeats": args.repeats,
+        },
+        "stages": stages,
+        "documents": documents,
+        "throughput": throughput,
+        "peak_rss_mb": {"main": _peak_rss_mb(resource.RUSAGE_SELF), "workers": _peak_rss_mb(resource.RUSAGE_CHILDREN)},
+    }
+
+    for mode, by_stage in stages.items():
+        print(f"{mode:>8}: " + ", ".join(f"{stage} p50 {s['p50'] * 1000:.0f} ms / p95 {s['p95'] * 1000:.0f} ms"
+                                         for stage, s in by_stage.items()))
+    print(f"peak RSS: main {results['peak_rss_mb']['main']:.0f} MB, workers {results['peak_rss_mb']['workers']:.0f} MB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("latency") != args.latency:
+            print(f"Warning: the baseline was measured with --latency {baseline.get('meta', {}).get('latency')}")
+        regressions = compare(baseline, results, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmarks for language detection and prompt assembly, against the code they replaced,
+and the size of the static prompt prefixes the provider can cache.
+
+    python -m benchmarks.bench_prompts --number 2000
+"""
+import argparse
+import os
+import re
+import timeit
+
+os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+import analyzer
+from benchmarks.corpus import SIZES, cv_lines
+from preprocess import count_tokens, detect_language
+
+
+def legacy_detect_language(text: str) -> str:
+    # Three full-text regex scans, as detect_language did before.
+    if not text:
+        return "en"
+    cyr = len(re.findall(r"[А-Яа-яЁёІіЇїЄєҐґ]", text))
+    lat = len(re.findall(r"[A-Za-z]", text))
+    if re.search(r"[ІіЇїЄєҐґ]", text):
+        return "uk"
+    return "uk" if cyr > lat else "en"
+
+
+def legacy_full_prompt(content: str, lang: str) -> str:
+    # The per-call f-string build the analyzer used: market notes looked up and the whole prompt formatted.
+    market_note, style_note, reply_lang = analyzer.market_and_style(lang)
+    return f"""
+You are a professional career consultant with 10+ years of experience in HR and CV coaching.
+{market_note}
+{style_note}
+{reply_lang}
+{analyzer.FULL_REVIEW_TASK}{content}
+"""
+
+
+def _per_call_us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000, help="calls per timing")
+    args = parser.parse_args()
+
+    texts = {f"{size}-{lang}": "\n".join(cv_lines(lang, jobs)) for size, jobs in SIZES.items() for lang in ("en", "uk")}
+    # The largest input load_resume lets through (safe_take_blocks).
+    texts["max-uk"] = (texts["long-uk"] * 4)[:120_000]
+
+    print("detect_language")
+    for name, text in texts.items():
+        assert detect_language(text) == legacy_detect_language(text), name
+        number = max(args.number // max(len(text) // 5000, 1), 10)
+        before = _per_call_us(lambda: legacy_detect_language(text), number)
+        after = _per_call_us(lambda: detect_language(text), number)
+        print(f"{name:>10} ({len(text):>6} chars): {before:8.1f} µs → {after:7.1f} µs ({before / after:.1f}x)")
+
+    print("prompt assembly (resume mode)")
+    for name in ("typical-en", "typical-uk", "long-uk"):
+        text, lang = texts[name], name.split("-")[1]
+        assert analyzer._build_full_prompt(text, lang) == legacy_full_prompt(text, lang), name
+        before = _per_call_us(lambda: legacy_full_prompt(text, lang), args.number)
+        after = _per_call_us(lambda: analyzer._build_full_prompt(text, lang), args.number)
+        print(f"{name:>10} ({len(text):>6} chars): {before:8.2f} µs → {after:7.2f} µs ({before / after:.1f}x)")
+
+    # OpenAI caches prompt prefixes of 1024+ tokens; the section calls also share the resume.
+    print("static prefix tokens")
+    for (mode, lang), prefix in analyzer.PROMPT_PREFIXES.items():
+        print(f"{mode:>20} {lang}: {count_tokens(prefix)}")
+    shared = count_tokens(analyzer.prompt_prefix("section", "uk") + texts["typical-uk"])
+    print(f"shared by the 5 step-by-step section calls (typical-uk CV): {shared}")
+
+
+if __name__ == "__main__":
+    main()
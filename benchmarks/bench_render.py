@@ -0,0 +1,66 @@
+"""
+PDF rendering throughput and latency through the warm renderer pool.
+
+    python -m benchmarks.bench_render --kind html --renders 50 --concurrency 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import renderer
+from benchmarks.fake_openai import CANNED_REPLY
+
+SAMPLE_REPORT = {
+    "name": "Jane Doe",
+    "summary": "Experienced data engineer with a strong delivery record.",
+    "sections": [
+        {"title": "Summary/Profile", "score": 7, "feedback": "Name the target role."},
+        {"title": "Skills & Qualifications", "score": 8, "feedback": "Group skills by category."},
+        {"title": "Experience", "score": 6, "feedback": "Quantify your achievements."},
+        {"title": "Education", "score": 9, "feedback": "Well-detailed and relevant."},
+        {"title": "Formatting & ATS", "score": 5, "feedback": "Avoid tables and columns."},
+    ],
+    "overall_score": 70,
+    "recommendations": ["Use action verbs.", "Include metrics in experience."],
+}
+
+
+async def _run(kind: str, renders: int, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            if kind == "html":
+                await renderer.render(SAMPLE_REPORT)
+            else:
+                await renderer.render_text(CANNED_REPLY)
+            latencies.append(time.perf_counter() - start)
+
+    # First render per worker pays process start-up; keep it out of the numbers.
+    await asyncio.gather(*(renderer.render_text("warm-up") for _ in range(renderer.RENDER_WORKERS)))
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(renders)))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kind", choices=["html", "text"], default="html")
+    parser.add_argument("--renders", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    elapsed, latencies = asyncio.run(_run(args.kind, args.renders, args.concurrency))
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(
+        f"{args.kind}: {args.renders} renders in {elapsed:.2f}s — {args.renders / elapsed:.1f} renders/s, "
+        f"p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+    )
+    renderer.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Scheduler behaviour under a burst of uploads against the fake OpenAI server.
+
+    python -m benchmarks.bench_scheduler --users 10 --jobs-per-user 3 --latency 1 --error-rate 0.2
+
+Reports wall time, retries, peak concurrency and how long each user waited
+for their first result (fairness: a heavy user should not delay the others).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.fake_openai import start_fake_openai
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--jobs-per-user", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    _, base_url = start_fake_openai(latency=args.latency, error_rate=args.error_rate)
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="fake")
+    import analyzer
+    from scheduler import JobScheduler
+
+    scheduler = JobScheduler(max_concurrent=args.concurrency, backoff=0.1)
+    in_flight = 0
+    peak = 0
+    first_done = {}
+    queued_notices = 0
+
+    async def job(user_id, n):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await analyzer._ask_gpt(f"user {user_id} job {n}")
+        finally:
+            in_flight -= 1
+
+    async def user(user_id, start):
+        async def on_queued(position):
+            nonlocal queued_notices
+            queued_notices += 1
+
+        jobs = [scheduler.submit(user_id, lambda n=n: job(user_id, n), on_queued) for n in range(args.jobs_per_user)]
+        for finished in asyncio.as_completed(jobs):
+            await finished
+            first_done.setdefault(user_id, time.perf_counter() - start)
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(user(u, start) for u in range(args.users)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    waits = sorted(first_done.values())
+    print(
+        f"{args.users * args.jobs_per_user} jobs in {elapsed:.2f}s, peak concurrency {peak}/{args.concurrency}, "
+        f"{scheduler.retries} retries, {scheduler.failed} failed, {queued_notices} queue notices"
+    )
+    print(f"time to first result per user: median {statistics.median(waits):.2f}s, worst {waits[-1]:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start cost of importing the bot, from `python -X importtime` in fresh interpreters:
+import time, number of modules loaded, the heaviest imports, and which of the lazily loaded
+dependencies the import pulled in anyway (exits with status 1 if any).
+
+    python -m benchmarks.bench_startup --runs 5 [--module bot] [--top 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use of a feature, never by importing the bot.
+LAZY_MODULES = ("fitz", "pymupdf", "openai", "reportlab", "weasyprint", "jinja2", "numpy")
+
+PROBE = "import sys; import {module}; print(','.join(m for m in {lazy!r} if m in sys.modules))"
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(cumulative µs, depth, module)] from `python -X importtime` output, in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+    return rows
+
+
+def run_once(code: str) -> tuple:
+    """(wall seconds, importtime rows, stdout) of one fresh interpreter running code."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=REPO, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode:
+        raise SystemExit(proc.stderr[-2000:])
+    return wall, parse_importtime(proc.stderr), proc.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="bot")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    code = PROBE.format(module=args.module, lazy=LAZY_MODULES)
+    run_once(code)  # writes the .pyc files, so compiling is not measured
+    bare = statistics.median(run_once("pass")[0] for _ in range(args.runs))
+    runs = [run_once(code) for _ in range(args.runs)]
+
+    def import_us(rows):
+        return next(us for us, depth, name in rows if depth == 0 and name == args.module)
+
+    runs.sort(key=lambda run: import_us(run[1]))
+    wall, rows, loaded = runs[len(runs) // 2]
+    print(
+        f"import {args.module}: {import_us(rows) / 1000:.0f} ms (median of {args.runs}), "
+        f"{len(rows)} modules, process {wall * 1000:.0f} ms vs {bare * 1000:.0f} ms for a bare interpreter"
+    )
+    print(f"heaviest imports under {args.module}:")
+    for us, _, name in sorted((r for r in rows if r[1] == 1), reverse=True)[:args.top]:
+        print(f"  {us / 1000:7.1f} ms  {name}")
+    if loaded:
+        print(f"loaded at import although they should be lazy: {loaded}")
+        sys.exit(1)
+    print(f"not loaded at import: {', '.join(LAZY_MODULES)}")
+
+
+if __name__ == "__main__":
+    main()
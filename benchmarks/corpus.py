@@ -0,0 +1,124 @@
+"""
+Synthetic CV documents for the benchmarks.
+
+build_corpus() writes the full matrix used by bench_pipeline: PDF/DOCX/TXT, small (half a page),
+typical (1–2 pages) and long (30+ pages), in English and in Ukrainian.
+"""
+import html
+import os
+
+import fitz  # PyMuPDF
+
+LATIN_PARAGRAPH = (
+    "Senior Python developer with 8 years of experience building data pipelines, "
+    "REST APIs and cloud services on AWS. Led a team of 5 engineers, cut infrastructure "
+    "costs by 30% and improved deployment frequency from monthly to daily."
+)
+
+CYRILLIC_PARAGRAPH = (
+    "Старший Python-розробник з 8 роками досвіду у створенні конвеєрів даних, "
+    "REST API та хмарних сервісів на AWS. Керував командою з 5 інженерів, скоротив витрати "
+    "на інфраструктуру на 30% і перейшов від щомісячних до щоденних релізів."
+)
+
+CV_TEXT = {
+    "en": {
+        "name": "John Smith",
+        "contact": "john.smith@example.com · +44 20 7946 0000 · London",
+        "headings": ("Summary", "Skills", "Experience", "Education"),
+        "summary": LATIN_PARAGRAPH,
+        "skills": "Python, SQL, Airflow, Spark, Docker, Kubernetes, AWS (S3, Lambda, Redshift), Terraform",
+        "job": "Data Engineer, Company {n} ({start}–{end})",
+        "bullet": "Built an ingestion pipeline processing {n}M events a day; reduced latency by {p}%.",
+        "education": "BSc Computer Science, University of Manchester, 2014",
+    },
+    "uk": {
+        "name": "Іван Петренко",
+        "contact": "ivan.petrenko@example.com · +380 44 000 0000 · Київ",
+        "headings": ("Профіль", "Навички", "Досвід роботи", "Освіта"),
+        "summary": CYRILLIC_PARAGRAPH,
+        "skills": "Python, SQL, Airflow, Spark, Docker, Kubernetes, AWS (S3, Lambda, Redshift), Terraform",
+        "job": "Інженер даних, Компанія {n} ({start}–{end})",
+        "bullet": "Створив конвеєр обробки {n} млн подій на день; зменшив затримку на {p}%.",
+        "education": "Бакалавр комп'ютерних наук, КПІ ім. Ігоря Сікорського, 2014",
+    },
+}
+
+# Jobs per CV size; each job is a heading and six bullets (~10 lines).
+SIZES = {"small": 1, "typical": 6, "long": 180}
+LINES_PER_PAGE = 45
+
+
+def make_pdf(path: str, pages: int = 2, paragraph: str = LATIN_PARAGRAPH) -> str:
+    # insert_textbox writes nothing when the text overflows the box; insert_htmlbox shrinks it to fit.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    body = "".join(f"<p>{html.escape(paragraph)}</p>" for _ in range(12))
+    with fitz.open() as doc:
+        for i in range(pages):
+            doc.new_page().insert_htmlbox(fitz.Rect(50, 50, 545, 790), f"<p>Page {i + 1}</p>{body}")
+        doc.save(path)
+    return path
+
+
+def cv_lines(lang: str = "en", jobs: int = 6) -> list:
+    """A CV as text lines: header, summary, skills, `jobs` positions, education."""
+    t = CV_TEXT[lang]
+    summary, skills, experience, education = t["headings"]
+    lines = [t["name"], t["contact"], "", summary, t["summary"], "", skills, t["skills"], "", experience]
+    for n in range(jobs):
+        lines.append(t["job"].format(n=n + 1, start=2023 - n, end=2024 - n))
+        lines.extend("• " + t["bullet"].format(n=n + k + 1, p=10 + k * 5) for k in range(6))
+        lines.append("")
+    lines += [education, t["education"]]
+    return lines
+
+
+def make_cv_pdf(path: str, lines: list) -> str:
+    # insert_htmlbox falls back to bundled Noto fonts, so Cyrillic text survives extraction.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with fitz.open() as doc:
+        for start in range(0, len(lines), LINES_PER_PAGE):
+            body = "".join(f"<p>{html.escape(line) or '&nbsp;'}</p>" for line in lines[start:start + LINES_PER_PAGE])
+            doc.new_page().insert_htmlbox(fitz.Rect(50, 50, 545, 790), body)
+        doc.save(path)
+    return path
+
+
+def make_cv_docx(path: str, lines: list) -> str:
+    from docx import Document
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+    return path
+
+
+def make_cv_txt(path: str, lines: list) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+WRITERS = {"pdf": make_cv_pdf, "docx": make_cv_docx, "txt": make_cv_txt}
+
+
+def build_corpus(directory: str, sizes=tuple(SIZES), langs=("en", "uk"), formats=tuple(WRITERS)) -> dict:
+    """Writes every size × language × format combination; returns {"long-uk.pdf": path, ...}."""
+    corpus = {}
+    for size in sizes:
+        for lang in langs:
+            lines = cv_lines(lang, SIZES[size])
+            for fmt in formats:
+                name = f"{size}-{lang}.{fmt}"
+                corpus[name] = WRITERS[fmt](os.path.join(directory, name), lines)
+    return corpus
+
+
+VACANCY_TEXT = (
+    "Senior Data Engineer (London, hybrid). You will design batch and streaming pipelines on AWS, "
+    "own our Airflow platform and mentor two engineers. Requirements: 5+ years of Python and SQL, "
+    "Spark, Kubernetes, Terraform; experience with data quality tooling is a plus."
+)
@@ -0,0 +1,166 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+    python -m benchmarks.fake_openai --port 8765 --latency 2
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python bot.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_REPLY = """The CV is clear and well structured, but the achievements need more measurable impact.
+
+**Summary/Profile**
+Concise, but generic. Name the target role and one headline achievement.
+
+**Skills/Qualifications**
+Good technical range. Group skills by category and drop outdated tools.
+
+**Experience**
+Responsibilities dominate. Rewrite bullets as achievements with metrics.
+
+**Education**
+Relevant and complete.
+
+**Formatting & ATS**
+Avoid tables and two-column layouts so ATS parsers keep the reading order.
+
+📊 CV Score Breakdown:
+• Summary/Profile: 6 / 10
+• Skills & Qualifications: 8 / 10
+• Experience: 6 / 10
+• Education: 9 / 10
+• Formatting & ATS: 7 / 10
+
+🌟 Overall Score: 72 / 100
+
+📌 Recommendations:
+• Add metrics to every experience bullet.
+• Tailor the summary to the target role.
+• Move key skills above the fold.
+"""
+
+CANNED_REPORT = json.dumps({
+    "summary": "The CV is clear and well structured, but achievements need more measurable impact.",
+    "sections": [
+        {"key": "sum", "score": 6, "feedback": "Concise, but generic.", "rewrite": "Data engineer who cut AWS costs by 30%."},
+        {"key": "skills", "score": 8, "feedback": "Good technical range.", "rewrite": ""},
+        {"key": "exp", "score": 6, "feedback": "Responsibilities dominate.", "rewrite": "Led 5 engineers to ship daily releases."},
+        {"key": "edu", "score": 9, "feedback": "Relevant and complete.", "rewrite": ""},
+        {"key": "fmt", "score": 7, "feedback": "Avoid two-column layouts.", "rewrite": ""},
+    ],
+    "overall_score": 72,
+    "recommendations": ["Add metrics to every experience bullet.", "Tailor the summary to the target role."],
+}, ensure_ascii=False)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    token_delay = 0.01
+    error_rate = 0.0  # share of requests answered with 429 / 503, to exercise retries
+    reply = CANNED_REPLY
+    report_reply = CANNED_REPORT
+    requests_served = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        type(self).requests_served += 1
+        if random.random() < self.error_rate:
+            status = random.choice([429, 503])
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Retry-After", "0.1")
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": {"message": "Simulated overload", "code": status}}).encode("utf-8"))
+            return
+        time.sleep(self.latency)
+        reply = self.report_reply if request.get("response_format") else self.reply
+        prompt_chars = sum(len(m.get("content", "")) for m in request.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(reply) // 4,
+            "total_tokens": (prompt_chars + len(reply)) // 4,
+        }
+        if request.get("stream"):
+            self._stream(request, reply, usage)
+            return
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{self.requests_served}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, request: dict, reply: str, usage: dict):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.close_connection = True
+        base = {
+            "id": f"chatcmpl-fake-{self.requests_served}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4"),
+        }
+        for i in range(0, len(reply), 16):
+            chunk = {**base, "choices": [{"index": 0, "delta": {"content": reply[i:i + 16]}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.token_delay)
+        if request.get("stream_options", {}).get("include_usage"):
+            self.wfile.write(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def make_server(port: int = 0, latency: float = 0.0, reply: str = CANNED_REPLY,
+                error_rate: float = 0.0) -> ThreadingHTTPServer:
+    handler = type("Handler", (FakeOpenAIHandler,), {"latency": latency, "reply": reply, "error_rate": error_rate})
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def start_fake_openai(port: int = 0, latency: float = 0.0, reply: str = CANNED_REPLY, error_rate: float = 0.0):
+    """Starts the server in a daemon thread and returns (server, base_url)."""
+    server = make_server(port, latency, reply, error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before replying")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 429/503")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency, error_rate=args.error_rate)
+    print(f"Fake OpenAI API on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Local stand-in for the Telegram Bot API, enough for the bot's own calls:
+getMe, setWebhook, sendMessage, editMessageText, sendDocument, answerCallbackQuery,
+getFile and file downloads. Every call is recorded for the load-test harness.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+BOT_USER = {"id": 1000, "is_bot": True, "first_name": "CVise", "username": "cvise_test_bot"}
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    files = {}  # file_path -> bytes served under /file/bot<token>/<file_path>
+    calls = []  # (monotonic time, method, params)
+    lock = threading.Lock()
+    next_message_id = [1]
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _params(self) -> dict:
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/json"):
+            return json.loads(raw or b"{}")
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return {k: v[0] for k, v in parse_qs(raw.decode("utf-8")).items()}
+        if content_type.startswith("multipart/form-data"):
+            # Only the chat id matters for the harness; pull it out of the form without a full parser.
+            marker = b'name="chat_id"\r\n\r\n'
+            if marker in raw:
+                return {"chat_id": raw.split(marker, 1)[1].split(b"\r\n", 1)[0].decode()}
+        return {}
+
+    def _message(self, params: dict, **extra) -> dict:
+        with self.lock:
+            message_id = self.next_message_id[0]
+            self.next_message_id[0] += 1
+        chat_id = int(params.get("chat_id", 0))
+        return {
+            "message_id": int(params.get("message_id", message_id)),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            **extra,
+        }
+
+    def do_GET(self):
+        if "/file/bot" in self.path:
+            file_path = self.path.split("/", 3)[-1]
+            body = self.files.get(file_path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.do_POST()
+
+    def do_POST(self):
+        method = self.path.rsplit("/", 1)[-1]
+        params = self._params() if self.command == "POST" else {}
+        with self.lock:
+            self.calls.append((time.monotonic(), method, params))
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method in ("setWebhook", "deleteWebhook", "answerCallbackQuery"):
+            result = True
+        elif method in ("sendMessage", "editMessageText"):
+            result = self._message(params, text=params.get("text", ""))
+        elif method == "sendDocument":
+            result = self._message(params, document={"file_id": "out", "file_unique_id": "out"})
+        elif method == "getFile":
+            file_id = params.get("file_id", "")
+            result = {"file_id": file_id, "file_unique_id": file_id, "file_path": f"documents/{file_id}"}
+        else:
+            result = True
+        self._send_json({"ok": True, "result": result})
+
+
+def start_fake_telegram(port: int = 0, files: dict = None):
+    """Starts the stand-in in a daemon thread and returns (server, api_url, handler_class)."""
+    handler = type("Handler", (FakeTelegramHandler,), {
+        "files": dict(files or {}),
+        "calls": [],
+        "lock": threading.Lock(),
+        "next_message_id": [1],
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", handler
@@ -0,0 +1,165 @@
+"""
+Load test for webhook mode: replays synthetic Telegram updates against `webhook.py`
+with a stand-in Bot API and the fake OpenAI server, then measures drain on SIGTERM.
+Exits with status 1 if any user got an error reply instead of an analysis.
+
+    python -m benchmarks.load_webhook --users 40 --workers 4 --latency 1 [--signal-group]
+"""
+import argparse
+import itertools
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import SIZES, cv_lines, make_cv_pdf
+from benchmarks.fake_openai import start_fake_openai
+from benchmarks.fake_telegram import start_fake_telegram
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DONE_TEXT = "You can download the result as PDF"
+ERROR_PREFIXES = ("❌", "[❌")
+_update_ids = itertools.count(1)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _update(user_id: int, **message) -> dict:
+    return {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": next(_update_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"},
+            **message,
+        },
+    }
+
+
+def _post(url: str, update: dict):
+    request = urllib.request.Request(url, data=json.dumps(update).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status
+
+
+def _wait_for_listener(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("webhook listener did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=1.0, help="fake LLM latency, seconds")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--signal-group", action="store_true",
+                        help="send SIGTERM to the whole process group, as `systemctl stop` does")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cvise-load-")
+    cv_path = make_cv_pdf(os.path.join(workdir, "cv.pdf"), cv_lines("en", SIZES["typical"]))
+    with open(cv_path, "rb") as f:
+        cv_bytes = f.read()
+
+    _, openai_url = start_fake_openai(latency=args.latency)
+    _, telegram_url, telegram = start_fake_telegram(files={"documents/cv": cv_bytes})
+    port = _free_port()
+    user_ids = list(range(5000, 5000 + args.users))
+    env = {
+        **os.environ,
+        "TELEGRAM_TOKEN": "123:fake",
+        "TELEGRAM_API_URL": telegram_url,
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": openai_url,
+        "ALLOWED_USER_IDS": ",".join(map(str, user_ids)),
+        "WEBHOOK_PORT": str(port),
+        "WEBHOOK_WORKERS": str(args.workers),
+        "WEBHOOK_URL": "",
+        "STREAM_RESPONSES": "0",
+    }
+    router = subprocess.Popen([sys.executable, os.path.join(REPO, "webhook.py")], cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        _wait_for_listener(port)
+        url = f"http://127.0.0.1:{port}/telegram"
+        time.sleep(2)  # let workers finish getMe/initialize
+
+        for uid in user_ids:
+            _post(url, _update(uid, text="CV analysis"))
+        time.sleep(0.5)
+
+        document = {"file_id": "cv", "file_unique_id": "cv", "file_name": "cv.pdf",
+                    "mime_type": "application/pdf", "file_size": len(cv_bytes)}
+        sent_at = {}
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            for uid in user_ids:
+                sent_at[uid] = time.monotonic()
+                pool.submit(_post, url, _update(uid, document=document))
+
+        finished, failed = {}, {}
+        while len(finished) + len(failed) < len(user_ids) and time.monotonic() - start < args.timeout:
+            with telegram.lock:
+                calls = list(telegram.calls)
+            for t, method, params in calls:
+                text = params.get("text", "")
+                if method in ("sendMessage", "editMessageText") and text.startswith(ERROR_PREFIXES):
+                    failed.setdefault(int(params["chat_id"]), text)
+                elif method == "sendMessage" and text.startswith(DONE_TEXT):
+                    finished.setdefault(int(params["chat_id"]), t)
+            time.sleep(0.1)
+        elapsed = time.monotonic() - start
+
+        latencies = sorted(finished[uid] - sent_at[uid] for uid in finished)
+        print(f"{len(finished)}/{len(user_ids)} analyses completed in {elapsed:.2f}s "
+              f"({len(finished) / elapsed:.2f}/s) with {args.workers} workers")
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"latency: p50 {statistics.median(latencies):.2f}s, p95 {p95:.2f}s")
+        if failed:
+            print(f"{len(failed)} users got an error reply, e.g.: {next(iter(failed.values()))[:200]}")
+
+        # Graceful drain: queue one more round of work, then ask the router to stop.
+        with telegram.lock:
+            seen = len(telegram.calls)
+        drain_users = user_ids[: args.workers]
+        for uid in drain_users:
+            _post(url, _update(uid, text="CV analysis"))
+        drain_start = time.monotonic()
+        if args.signal_group:
+            os.killpg(router.pid, signal.SIGTERM)
+        else:
+            router.send_signal(signal.SIGTERM)
+        router.wait(timeout=args.timeout)
+        with telegram.lock:
+            answered = {int(params["chat_id"]) for _, method, params in telegram.calls[seen:] if method == "sendMessage"}
+        print(f"drain after SIGTERM took {time.monotonic() - drain_start:.2f}s, exit code {router.returncode}, "
+              f"{len(answered & set(drain_users))}/{len(drain_users)} queued updates answered")
+    finally:
+        if router.poll() is None:
+            router.kill()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
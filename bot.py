@@ -1,18 +1,58 @@
 import os
+import time
+import uuid
+import asyncio
 import logging
+import zipfile
+from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
+from telegram.error import BadRequest, RetryAfter
+from telegram.ext import (
+    ApplicationBuilder,
+    BaseUpdateProcessor,
+    CommandHandler,
+    MessageHandler,
+    filters,
+    ContextTypes,
+    CallbackQueryHandler,
+)
 from analyzer import (
-    extract_text_from_file,
+    load_resume,
     analyze_resume,
     analyze_for_vacancy,
     give_hr_feedback,
     generate_cover_letter,
     step_by_step_review,
-    edit_section,
-    render_html_to_pdf,
-    build_output_path
+    review_section,
+    rescore_section,
+    cached_section_rewrite,
+    full_report,
+    render_report_pdf,
+    SECTION_LABELS,
+    STEP_ORDER,
+)
+from config import (
+    STREAM_RESPONSES,
+    STREAM_EDIT_INTERVAL,
+    FULL_REPORT_MERGED,
+    STEP_INCREMENTAL,
+    SESSION_FLUSH_INTERVAL,
+    TELEGRAM_API_URL,
+    ALLOWED_USER_IDS,
+    MAX_UPLOAD_BYTES,
+    METRICS_PORT,
 )
+from extractors import ExtractionError, extract_blocks_async, make_upload, purge_spill_dir, shutdown_pool
+from scheduler import scheduler
+from matcher import match
+from preprocess import render_blocks
+from storage import sessions, history, HISTORY_SECTIONS
+import metrics
+from collections import OrderedDict
+import renderer
+import batch
+import clients
+import exporter
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,7 +61,7 @@ TOKEN = os.getenv("TELEGRAM_TOKEN")
 logging.basicConfig(level=logging.INFO)
 
 ADMIN_ID = 6929149032
-ALLOWED_USERS = {ADMIN_ID}
+ALLOWED_USERS = {ADMIN_ID} | ALLOWED_USER_IDS
 DENY_MSG = (
     "❌ You do not have access to this bot.\n\n"
     "If you would like to use it, please send your request to: mchprojects1@gmail.com"
@@ -48,13 +88,12 @@ async def notify_admin_about_unauthorized(update: Update, context: ContextTypes.
     except Exception as e:
         logging.error(f"Failed to notify admin about unauthorized access: {e}")
 
-user_state = {}
-user_results = {}
-user_step_sections = {}
-user_analysis_data = {}
+# Rendered PDFs are process-local and bounded; sessions only keep the analysis they are built from.
+pdf_cache = OrderedDict()
+PDF_CACHE_ITEMS = 64
 
 markup = ReplyKeyboardMarkup(
-    [["CV analysis", "CV and job match analysis"], ["HR Expert Advice", "Generate Cover Letter"], ["Step-by-step CV review"]],
+    [["CV analysis", "CV and job match analysis"], ["HR Expert Advice", "Generate Cover Letter"], ["Step-by-step CV review", "Full CV report"], ["Batch CV screening"]],
     resize_keyboard=True
 )
 
@@ -79,17 +118,28 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "CV and job match analysis": "vacancy",
         "HR Expert Advice": "consult",
         "Generate Cover Letter": "cover",
-        "Step-by-step CV review": "step"
+        "Step-by-step CV review": "step",
+        "Full CV report": "full",
+        "Batch CV screening": "batch"
     }
 
+    session = sessions.get(user_id)
+    if text not in modes and session.get("awaiting_edit"):
+        with metrics.trace("edit", user_id):
+            await apply_section_edit(update, context, user_id, session["awaiting_edit"], text)
+        return
+
     if text in modes:
-        user_state.setdefault(user_id, {})["mode"] = modes[text]
+        reset_step_review(user_id)
+        update_session(user_id, mode=modes[text])
         prompts = {
             "resume": "Please upload your resume in PDF, DOCX or text format",
             "vacancy": "Please send the job vacancy (PDF, DOCX or text), and then send your CV",
             "consult": "Please send your CV for an HR consultation",
             "cover": "Please send the job vacancy (PDF, DOCX or text), and then send your CV",
-            "step": "Please upload your CV to start the step-by-step review"
+            "step": "Please upload your CV to start the step-by-step review",
+            "full": "Please upload your CV for a full report: analysis, HR advice and a step-by-step review",
+            "batch": "Please send the job vacancy (PDF, DOCX or text), and then a ZIP archive with the CVs to rank"
         }
         await update.message.reply_text(prompts[modes[text]], reply_markup=markup)
     else:
@@ -107,97 +157,442 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Please upload your resume in PDF, DOCX or text format")
         return
 
-    file = await context.bot.get_file(document.file_id)
-    file_path = f"{document.file_id}_{document.file_name}"
-    await file.download_to_drive(file_path)
-    await process_input(update, context, file_path)
+    if document.file_size and document.file_size > MAX_UPLOAD_BYTES:
+        await update.message.reply_text(
+            f"\u274c The file is too large. Please upload a document under {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+        )
+        return
+
+    with metrics.trace(sessions.get(user_id).get("mode"), user_id):
+        with metrics.span("download"):
+            file = await context.bot.get_file(document.file_id)
+            data = await file.download_as_bytearray()
+        upload = make_upload(document.file_name or "document.txt", data)
+        try:
+            await process_input(update, context, upload)
+        finally:
+            upload.cleanup()
+        logging.info(f"Upload {document.file_name}: {len(data)} bytes received, {upload.bytes_written} bytes written to disk")
+
+async def run_job(update: Update, user_id: int, job):
+    """Runs an analysis through the shared LLM scheduler, telling the user if they have to wait."""
+    async def on_queued(position: int):
+        await update.message.reply_text(
+            f"\u23f3 The bot is busy right now. You are #{position} in the queue — your request will start automatically."
+        )
+    return await scheduler.submit(user_id, job, on_queued=on_queued)
 
-async def process_input(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str):
+async def process_input(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path):
+    """file_path is the uploaded document: an extractors.Upload (or a path on disk)."""
     user_id = update.effective_user.id
-    mode = user_state.get(user_id, {}).get("mode")
+    session = sessions.get(user_id)
+    mode = session.get("mode")
+
+    streamer = None
+    on_delta = None
 
     try:
-        if mode in ["vacancy", "cover"]:
-            if "vacancy" not in user_state[user_id]:
-                user_state[user_id]["vacancy"] = file_path
-                await update.message.reply_text("Thank you! Please send your CV now")
+        if mode in ["vacancy", "cover", "resume", "consult"] and STREAM_RESPONSES:
+            if mode in ["resume", "consult"] or "vacancy" in session:
+                placeholder = await update.message.reply_text("\u231b Processing your request...")
+                streamer = MessageStreamer(placeholder)
+                on_delta = streamer.update
+
+        if mode in ["vacancy", "cover", "batch"]:
+            if "vacancy" not in session:
+                # Keep the vacancy as text: the upload itself is discarded when this handler returns.
+                with metrics.span("extract"):
+                    session["vacancy"] = render_blocks(await extract_blocks_async(file_path))
+                sessions.save(user_id, session)
+                if mode == "batch":
+                    await update.message.reply_text("Thank you! Now send a ZIP archive with the CVs (PDF, DOCX or TXT)")
+                else:
+                    await update.message.reply_text("Thank you! Please send your CV now")
+                return
+            elif mode == "batch":
+                await run_batch(update, user_id, file_path)
                 return
             else:
-                await update.message.reply_text("\u231b Processing your request... This may take 10–15 seconds")
+                if not streamer:
+                    await update.message.reply_text("\u231b Processing your request... This may take 10–15 seconds")
                 resume_path = file_path
-                vacancy_path = user_state[user_id].pop("vacancy")
+                # Read the CV before using up the vacancy, so an unreadable CV can simply be sent again.
+                resume_text, _ = await load_resume(resume_path)
+                vacancy_text = session.pop("vacancy")
+                sessions.save(user_id, session)
                 if mode == "vacancy":
-                    text_result, pdf_path = await analyze_for_vacancy(resume_path, extract_text_from_file(vacancy_path))
+                    # Instant local preview while GPT works on the full analysis
+                    with metrics.span("match"):
+                        quick = await asyncio.to_thread(match, resume_text, vacancy_text)
+                    await update.message.reply_text(quick.summary())
+                    text_result, report_data = await run_job(
+                        update, user_id, lambda: analyze_for_vacancy(resume_path, vacancy_text, on_delta, quick)
+                    )
                 else:
-                    text_result, pdf_path = await generate_cover_letter(extract_text_from_file(vacancy_path), extract_text_from_file(resume_path))
+                    text_result, report_data = await run_job(
+                        update, user_id, lambda: generate_cover_letter(vacancy_text, resume_text, on_delta)
+                    )
+
+        elif mode == "step" and STEP_INCREMENTAL:
+            await start_incremental_review(update, context, user_id, file_path)
+            return
 
         elif mode == "step":
             await update.message.reply_text("\u231b Processing your request... This may take 10–15 seconds")
-            sections, pdf_path = await step_by_step_review(file_path)
-            user_results[user_id] = pdf_path
-            user_step_sections[user_id] = sections
-
-            if not sections:
-                await update.message.reply_text("\u274c No sections parsed. Please try another file.")
-                return
+            sections, review_text = await run_job(update, user_id, lambda: step_by_step_review(file_path))
+            update_session(user_id, analysis=new_analysis(review_text))
+            await start_step_review(update, user_id, sections)
+            return
 
-            key, label, current = sections.pop(0)
-            user_state[user_id]["current_section"] = key
-            user_state[user_id]["current_text"] = current
-
-            keyboard = InlineKeyboardMarkup([
-                [
-                    InlineKeyboardButton("Yes, edit", callback_data=f"edit_yes_{key}"),
-                    InlineKeyboardButton("No, skip", callback_data=f"edit_no_{key}")
-                ]
-            ])
-            await update.message.reply_text(current, reply_markup=keyboard)
+        elif mode == "full":
+            await update.message.reply_text("\u231b Preparing your full report... This may take 15–20 seconds")
+            results = await run_job(update, user_id, lambda: full_report(file_path, merged=FULL_REPORT_MERGED))
+            with metrics.span("send"):
+                for title, (text, _) in (("📄 CV analysis", results["analysis"]), ("🧠 HR Expert Advice", results["hr"])):
+                    for chunk in split_text(f"{title}\n\n{text}"):
+                        await update.message.reply_text(chunk)
+
+            text_result, report_data = results["analysis"]
+            update_session(user_id, analysis=new_analysis(text_result, report_data))
+            await record_history(user_id, mode, report_data, file_path)
+            await update.message.reply_text("You can download the analysis as PDF or in another format:",
+                                            reply_markup=download_keyboard())
+
+            sections, _ = results["step"]
+            await update.message.reply_text("\U0001F4DD Now let's go through your CV section by section.")
+            await start_step_review(update, user_id, sections)
             return
 
         elif mode == "resume":
-            text_result, pdf_path = await analyze_resume(file_path)
+            text_result, report_data = await run_job(update, user_id, lambda: analyze_resume(file_path, on_delta))
         elif mode == "consult":
-            text_result, pdf_path = await give_hr_feedback(file_path)
+            text_result, report_data = await run_job(update, user_id, lambda: give_hr_feedback(file_path, on_delta))
         else:
-            text_result, pdf_path = ("\u274c Unknown mode. Please select again.", None)
+            await update.message.reply_text("\u274c Unknown mode. Please select again.")
+            return
 
-        user_results[user_id] = pdf_path if pdf_path else text_result
-        user_analysis_data[user_id] = text_result
+        update_session(user_id, analysis=new_analysis(text_result, report_data))
+        await record_history(user_id, mode, report_data, file_path)
 
-        for chunk in split_text(text_result):
-            await update.message.reply_text(chunk)
+        with metrics.span("send"):
+            if streamer:
+                await streamer.finish(text_result)
+            else:
+                for chunk in split_text(text_result):
+                    await update.message.reply_text(chunk)
 
-        if pdf_path:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("Download PDF version", callback_data="get_pdf")]
-            ])
-            await update.message.reply_text("You can download the result as PDF:", reply_markup=keyboard)
+        await update.message.reply_text("You can download the result as PDF or in another format:",
+                                        reply_markup=download_keyboard())
 
+    except ExtractionError as e:
+        # Unreadable document: tell the user instead of sending the error text to GPT.
+        if streamer:
+            await streamer.finish(str(e))
+        else:
+            await update.message.reply_text(str(e))
     except Exception as e:
         await update.message.reply_text(f"\u274c Something went wrong. Please try again later: {e}")
 
-async def handle_pdf_request(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer(text="\ud83d\udcc4 Generating PDF... Please wait.", show_alert=False)
+async def run_batch(update: Update, user_id: int, upload):
+    """Ranks the CVs in a ZIP archive against the vacancy stored in the session and sends CSV + PDF."""
+    if not upload.file_name.lower().endswith(".zip"):
+        await update.message.reply_text("Please send the CVs as one ZIP archive.")
+        return
+    try:
+        sources = batch.read_zip(upload)
+    except (ValueError, zipfile.BadZipFile) as e:
+        await update.message.reply_text(f"\u274c Could not use this archive: {e}")
+        return
+    if not sources:
+        await update.message.reply_text("\u274c The archive has no PDF, DOCX or TXT files.")
+        return
+
+    session = sessions.get(user_id)
+    vacancy_text = session.pop("vacancy")
+    sessions.save(user_id, session)
+    status = await update.message.reply_text(f"\u231b Screening {len(sources)} CVs...")
 
+    async def on_progress(text: str):
+        await status.edit_text(f"\u231b {text}...")
+
+    candidates = await batch.screen(sources, vacancy_text, owner=user_id, on_progress=on_progress)
+    pdf = await batch.to_pdf(candidates, vacancy_text)
+    with metrics.span("send"):
+        for chunk in split_text(batch.to_text(candidates, vacancy_text, limit=10)):
+            await update.message.reply_text(chunk)
+        await update.message.reply_document(document=batch.to_csv(candidates), filename="cvise_ranking.csv")
+        await update.message.reply_document(document=pdf, filename="cvise_ranking.pdf")
+
+def update_session(user_id: int, **changes) -> dict:
+    # Re-read before writing: the user may have changed mode while a long job was running.
+    session = sessions.get(user_id)
+    session.update(changes)
+    sessions.save(user_id, session)
+    return session
+
+def new_analysis(text: str, data: dict = None) -> dict:
+    return {"id": uuid.uuid4().hex, "text": text, "data": data}
+
+async def record_history(user_id: int, mode: str, report_data: dict, source=None):
+    """Adds the scores of a finished analysis to the /history store; text-only results are skipped."""
+    if history is None or not report_data:
+        return
+    file_name = getattr(source, "file_name", None) or (os.path.basename(source) if isinstance(source, str) else None)
     try:
-        user_id = str(query.from_user.id)
-        analysis_data = user_analysis_data.get(user_id)
+        # In a thread: the hourly prune after a long downtime can take a moment.
+        await asyncio.to_thread(history.add, user_id, mode, report_data, file_name)
+    except Exception as e:
+        logging.error(f"Failed to record analysis history: {e}")
+
+HISTORY_MODE_NAMES = {"resume": "CV analysis", "vacancy": "Job match", "consult": "HR advice", "full": "Full report"}
+
+def format_history(rows: list, mine: dict, everyone: dict) -> str:
+    lines = [f"\U0001F4C8 Your last {len(rows)} scored analyses:"]
+    for row in rows:
+        day = datetime.fromtimestamp(row["created_at"]).strftime("%Y-%m-%d")
+        name = f", {row['file_name']}" if row["file_name"] else ""
+        score = f"{row['overall']}/100" if row["overall"] is not None else "no overall score"
+        lines.append(f"• {day} {HISTORY_MODE_NAMES.get(row['mode'], row['mode'])}{name}: {score}")
+    scored = [row["overall"] for row in rows if row["overall"] is not None]
+    if len(scored) > 1:
+        lines.append(f"Change since the first one: {scored[-1] - scored[0]:+d}")
+
+    lines += ["", "📊 Section averages, you / all users:"]
+    for key in HISTORY_SECTIONS:
+        if mine[key] is not None:
+            overall = f"{everyone[key]:.1f}" if everyone[key] is not None else "–"
+            lines.append(f"• {SECTION_LABELS[key]}: {mine[key]:.1f} / {overall}")
+    return "\n".join(lines)
+
+async def show_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    if not is_allowed(user_id):
+        await notify_admin_about_unauthorized(update, context)
+        await update.message.reply_text(DENY_MSG)
+        return
+    if history is None:
+        await update.message.reply_text("History is turned off on this bot.")
+        return
+    rows = await asyncio.to_thread(history.trend, user_id, 10)
+    if not rows:
+        await update.message.reply_text("No scored analyses yet. Upload a CV to get your first score.", reply_markup=markup)
+        return
+    mine = await asyncio.to_thread(history.averages, user_id)
+    everyone = await asyncio.to_thread(history.averages)
+    await update.message.reply_text(format_history(rows, mine, everyone), reply_markup=markup)
+
+async def start_step_review(update: Update, user_id: int, sections: list):
+    reset_step_review(user_id)
+    if not sections:
+        await update.message.reply_text("\u274c No sections parsed. Please try another file.")
+        return
 
-        if not analysis_data:
+    key, label, current = sections[0]
+    update_session(user_id, step_sections=[list(section) for section in sections[1:]],
+                   current_section=key, current_text=current)
+    await update.message.reply_text(current, reply_markup=section_keyboard(key))
+
+def section_keyboard(key: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Yes, edit", callback_data=f"edit_yes_{key}"),
+            InlineKeyboardButton("No, skip", callback_data=f"edit_no_{key}")
+        ]
+    ])
+
+def edited_section_keyboard(key: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Edit again", callback_data=f"edit_yes_{key}"),
+            InlineKeyboardButton("Next section", callback_data=f"edit_no_{key}")
+        ]
+    ])
+
+# Incremental step-by-step review. Section jobs are process-local; webhook.py keeps each user on one worker.
+step_jobs = {}  # user_id -> {section key: SectionJob}
+
+class SectionJob:
+    """One section of the incremental review, generated in the background through the LLM scheduler."""
+
+    def __init__(self, user_id: int, key: str, content: str, lang: str):
+        self.key = key
+        self.streamer = None  # attached once the section is on screen while still generating
+        self.delivery = None  # the task that finishes the on-screen message once the section is ready
+        self.task = asyncio.create_task(
+            scheduler.submit(user_id, lambda: review_section(content, lang, key, on_delta=self._on_delta))
+        )
+        self.task.add_done_callback(self._log_failure)
+
+    def _log_failure(self, task: asyncio.Task):
+        # Retrieves the exception of a prefetched section the user never opened, which would
+        # otherwise only surface as "Task exception was never retrieved" at garbage collection.
+        if not task.cancelled() and task.exception():
+            logging.warning(f"Section {self.key} review failed: {task.exception()!r}")
+
+    async def _on_delta(self, text: str):
+        if self.streamer:
+            await self.streamer.update(text)
+
+def section_job(user_id: int, key: str, session: dict) -> SectionJob:
+    jobs = step_jobs.setdefault(user_id, {})
+    if key not in jobs:
+        jobs[key] = SectionJob(user_id, key, session["step_content"], session["step_lang"])
+    return jobs[key]
+
+def cancel_step_jobs(user_id: int):
+    for job in step_jobs.pop(user_id, {}).values():
+        job.task.cancel()
+
+def reset_step_review(user_id: int):
+    """Stops a step-by-step review in progress, so none of its sections carry over into the next one."""
+    cancel_step_jobs(user_id)
+    update_session(user_id, step_content=None, step_queue=[], step_texts={}, step_sections=[],
+                   current_section=None, current_text=None, awaiting_edit=None)
+
+async def start_incremental_review(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, file_path):
+    content, lang = await load_resume(file_path)
+    reset_step_review(user_id)
+    update_session(user_id, step_content=content, step_lang=lang, step_queue=STEP_ORDER[1:])
+    await show_step_section(context.bot, user_id, STEP_ORDER[0])
+
+async def show_step_section(bot, user_id: int, key: str):
+    """
+    Shows one section, streaming it in if it is not ready yet, then prefetches the next one
+    while the user reads. The buttons are there from the start, so a section can be skipped
+    before it has finished generating.
+    """
+    session = update_session(user_id, current_section=key, current_text=None)
+    job = section_job(user_id, key, session)
+    keyboard = section_keyboard(key)
+    if job.task.done():
+        await deliver_step_section(bot, user_id, job, keyboard)
+        return
+    placeholder = await bot.send_message(chat_id=user_id, text=f"⌛ Reviewing {SECTION_LABELS[key]}...",
+                                         reply_markup=keyboard)
+    job.streamer = MessageStreamer(placeholder, reply_markup=keyboard)
+    # Finished outside this update: PerUserUpdateProcessor handles a user's updates one at a time,
+    # so waiting for the section here would hold a "skip" press back until it is fully generated.
+    job.delivery = asyncio.create_task(deliver_step_section_later(bot, user_id, job, keyboard))
+
+async def deliver_step_section(bot, user_id: int, job: SectionJob, keyboard):
+    key = job.key
+    try:
+        text = await job.task
+    except asyncio.CancelledError:
+        return  # skipped (or a new review started) before the section was generated
+    except Exception:
+        step_jobs.get(user_id, {}).pop(key, None)  # not cached: the next attempt generates it again
+        raise
+
+    with metrics.span("send"):
+        if job.streamer:
+            await job.streamer.finish(text)
+        else:
+            await bot.send_message(chat_id=user_id, text=text, reply_markup=keyboard)
+
+    session = sessions.get(user_id)
+    texts = session.get("step_texts", {})
+    texts[key] = text
+    session = update_session(user_id, current_text=text, step_texts=texts)
+    if session.get("step_queue") and session.get("current_section") == key:
+        section_job(user_id, session["step_queue"][0], session)
+
+async def deliver_step_section_later(bot, user_id: int, job: SectionJob, keyboard):
+    try:
+        await deliver_step_section(bot, user_id, job, keyboard)
+    except Exception as e:
+        await bot.send_message(chat_id=user_id, text=f"❌ Something went wrong. Please try again later: {e}")
+
+async def apply_section_edit(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, key: str, text: str):
+    """
+    Re-scores only the section the user revised. The section stays current, so the user can send
+    another revision ("Edit again") before moving on.
+    """
+    update_session(user_id, awaiting_edit=None)
+    placeholder = await update.message.reply_text(f"⌛ Reviewing your new {SECTION_LABELS.get(key, key)} section...")
+    streamer = MessageStreamer(placeholder) if STREAM_RESPONSES else None
+    try:
+        # An equivalent revision was already rewritten for this user: no need to queue for the LLM.
+        result = cached_section_rewrite(user_id, key, text)
+        if result is None:
+            # Not run_job: the only wait here is usually this user's own prefetched section.
+            result = await scheduler.submit(
+                user_id, lambda: rescore_section(user_id, key, text, streamer.update if streamer else None)
+            )
+    except Exception as e:
+        await update.message.reply_text(f"❌ Something went wrong. Please try again later: {e}")
+        return
+
+    keyboard = edited_section_keyboard(key)
+    if streamer:
+        streamer.reply_markup = keyboard
+        await streamer.finish(result)
+    else:
+        await placeholder.edit_text(result, reply_markup=keyboard)
+
+    session = sessions.get(user_id)
+    texts = session.get("step_texts", {})
+    texts[key] = result
+    update_session(user_id, current_text=result, step_texts=texts)
+
+EXPORT_BUTTONS = (("docx", "DOCX"), ("md", "Markdown"), ("json", "JSON"), ("csv", "CSV"))
+
+def download_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("Download PDF version", callback_data="get_pdf")],
+        [InlineKeyboardButton(label, callback_data=f"export_{fmt}") for fmt, label in EXPORT_BUTTONS],
+    ])
+
+async def handle_export_request(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """DOCX, Markdown, JSON or CSV export of the last analysis; built from the session, no rendering pool."""
+    query = update.callback_query
+    fmt = query.data.removeprefix("export_")
+    await query.answer()
+
+    with metrics.trace("export", query.from_user.id):
+        analysis = sessions.get(query.from_user.id).get("analysis")
+        if not analysis or fmt not in exporter.FORMATS:
             await context.bot.send_message(chat_id=query.message.chat_id,
                                            text="\u274c No analysis data found. Please analyze your resume first.")
             return
+        try:
+            with metrics.span("export"):
+                document = await asyncio.to_thread(exporter.export, fmt, analysis["data"], analysis["text"])
+            with metrics.span("send"):
+                await context.bot.send_document(chat_id=query.message.chat_id, document=document,
+                                                filename=exporter.filename(fmt))
+        except Exception as e:
+            await context.bot.send_message(chat_id=query.message.chat_id,
+                                           text=f"\u274c Something went wrong during the export:\n{e}")
 
-        output_path = build_output_path(user_id, "html_report")
-        render_html_to_pdf(analysis_data, output_path)
+async def handle_pdf_request(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer(text="\ud83d\udcc4 Generating PDF... Please wait.", show_alert=False)
 
-        with open(output_path, "rb") as doc:
-            await context.bot.send_document(chat_id=query.message.chat_id, document=doc)
+    with metrics.trace("pdf", query.from_user.id):
+        try:
+            analysis = sessions.get(query.from_user.id).get("analysis")
 
-    except Exception as e:
-        await context.bot.send_message(chat_id=query.message.chat_id,
-                                       text=f"\u274c Something went wrong during PDF generation:\n{e}")
+            if not analysis:
+                await context.bot.send_message(chat_id=query.message.chat_id,
+                                               text="\u274c No analysis data found. Please analyze your resume first.")
+                return
+
+            # Rendered on the first click only, straight into memory; later clicks resend the same bytes.
+            pdf = pdf_cache.get(analysis["id"])
+            if pdf is None:
+                pdf = await render_report_pdf(analysis["text"], analysis["data"])
+                pdf_cache[analysis["id"]] = pdf
+                while len(pdf_cache) > PDF_CACHE_ITEMS:
+                    pdf_cache.popitem(last=False)
+
+            with metrics.span("send"):
+                await context.bot.send_document(chat_id=query.message.chat_id, document=pdf,
+                                                filename="cvise_report.pdf")
+
+        except Exception as e:
+            await context.bot.send_message(chat_id=query.message.chat_id,
+                                           text=f"\u274c Something went wrong during PDF generation:\n{e}")
 
 async def handle_edit_decision(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -205,37 +600,59 @@ async def handle_edit_decision(update: Update, context: ContextTypes.DEFAULT_TYP
     user_id = query.from_user.id
     data = query.data
     _, decision, section = data.split("_", 2)
+    label = SECTION_LABELS.get(section, section)
+
+    if section != sessions.get(user_id).get("current_section"):
+        return  # a button from a section that is already done
 
     if decision == "no":
-        await context.bot.send_message(chat_id=user_id, text=f"✅ OK! Moving on from *{section.replace('_', ' ').title()}*.", parse_mode="Markdown")
+        job = step_jobs.get(user_id, {}).get(section)
+        if job and not job.task.done():
+            job.task.cancel()  # skipped early: stop generating it
+            if job.streamer:
+                job.streamer.reply_markup = None
+                await job.streamer.finish(f"⏭️ {label}: skipped.")
+        await context.bot.send_message(chat_id=user_id, text=f"✅ OK! Moving on from *{label}*.", parse_mode="Markdown")
     else:
         await context.bot.send_message(
             chat_id=user_id,
-            text=f"✏️ Please send your revised version for the *{section.replace('_', ' ').title()}* section.",
+            text=f"✏️ Please send your revised version for the *{label}* section.",
             parse_mode="Markdown"
         )
-        user_state[user_id]["awaiting_edit"] = section
+        update_session(user_id, awaiting_edit=section)
         return
 
-    if user_step_sections[user_id]:
-        key, label, current = user_step_sections[user_id].pop(0)
-        user_state[user_id]["current_section"] = key
-        user_state[user_id]["current_text"] = current
-        keyboard = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("Yes, edit", callback_data=f"edit_yes_{key}"),
-                InlineKeyboardButton("No, skip", callback_data=f"edit_no_{key}")
-            ]
-        ])
-        await context.bot.send_message(chat_id=user_id, text=current, reply_markup=keyboard)
+    try:
+        with metrics.trace("step", user_id):
+            await next_step_section(context.bot, user_id)
+    except Exception as e:
+        await context.bot.send_message(chat_id=user_id, text=f"❌ Something went wrong. Please try again later: {e}")
+
+async def next_step_section(bot, user_id: int):
+    session = sessions.get(user_id)
+    if session.get("step_sections"):
+        key, label, current = session["step_sections"].pop(0)
+        session["current_section"] = key
+        session["current_text"] = current
+        sessions.save(user_id, session)
+        await bot.send_message(chat_id=user_id, text=current, reply_markup=section_keyboard(key))
+    elif session.get("step_queue"):
+        queue = session["step_queue"]
+        key = queue.pop(0)
+        update_session(user_id, step_queue=queue)
+        await show_step_section(bot, user_id, key)
     else:
-        await context.bot.send_message(chat_id=user_id, text="✅ Step-by-step review completed.")
-        pdf_path = user_results.get(user_id)
-        if pdf_path:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("Download PDF version", callback_data="get_pdf")]
-            ])
-            await context.bot.send_message(chat_id=user_id, text="You can download the result as PDF:", reply_markup=keyboard)
+        cancel_step_jobs(user_id)
+        texts = session.get("step_texts")
+        if texts:
+            review_text = "\n\n".join(texts[key] for key in STEP_ORDER if key in texts)
+            session = update_session(user_id, analysis=new_analysis(review_text), step_texts={}, current_section=None)
+        else:
+            session = update_session(user_id, current_section=None)
+        await bot.send_message(chat_id=user_id, text="✅ Step-by-step review completed.")
+        if session.get("analysis"):
+            await bot.send_message(chat_id=user_id, text="You can download the result as PDF or in another format:",
+                                   reply_markup=download_keyboard())
 
 def split_text(text, max_length=4000):
     lines = text.split('\n')
@@ -251,22 +668,136 @@ def split_text(text, max_length=4000):
         chunks.append(current)
     return chunks
 
-def main():
-    app = ApplicationBuilder().token(TOKEN).build()
+async def flush_sessions_periodically():
+    while True:
+        await asyncio.sleep(SESSION_FLUSH_INTERVAL)
+        sessions.flush()
+
+async def on_startup(app):
+    purge_spill_dir()
+    app.bot_data["session_flusher"] = asyncio.create_task(flush_sessions_periodically())
+
+async def on_shutdown(app):
+    flusher = app.bot_data.pop("session_flusher", None)
+    if flusher:
+        flusher.cancel()
+    sessions.close()
+    if history is not None:
+        history.close()
+    shutdown_pool()
+    renderer.shutdown_pool()
+    await clients.close()
+
+class MessageStreamer:
+    """
+    Shows a reply while it is still being generated by editing the placeholder message.
+    Edits are throttled to stay within Telegram's limits; text past split_text's
+    4000-char boundary rolls over into a new message.
+    """
+
+    def __init__(self, placeholder, interval: float = STREAM_EDIT_INTERVAL, reply_markup=None):
+        self.messages = [placeholder]
+        self.reply_markup = reply_markup  # kept on the last message, e.g. the step-by-step buttons
+        self.sent = [placeholder.text]
+        self.interval = interval
+        self.next_edit = 0.0
+
+    async def update(self, text: str):
+        if time.monotonic() >= self.next_edit:
+            await self._render(text)
+
+    async def finish(self, text: str):
+        await self._render(text, final=True)
+
+    async def _render(self, text: str, final: bool = False):
+        chunks = [c for c in split_text(text) if c.strip()]
+        for i, chunk in enumerate(chunks):
+            last = i == len(chunks) - 1
+            if not final and last:
+                chunk += " ▌"
+            markup = self.reply_markup if last else None
+            try:
+                if i < len(self.messages):
+                    if self.sent[i] != chunk:
+                        await self.messages[i].edit_text(chunk, reply_markup=markup)
+                        self.sent[i] = chunk
+                else:
+                    self.messages.append(await self.messages[-1].reply_text(chunk, reply_markup=markup))
+                    self.sent.append(chunk)
+            except RetryAfter as e:
+                if not final:
+                    self.next_edit = time.monotonic() + e.retry_after
+                    return
+                await asyncio.sleep(e.retry_after)
+                await self._render(text, final=True)
+                return
+            except BadRequest as e:
+                if "not modified" not in str(e).lower():
+                    raise
+        self.next_edit = time.monotonic() + self.interval
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Handles updates from different users concurrently, but one user's updates one at a time, in order:
+    handlers read, change and save the session, so a CV arriving while the vacancy is still being
+    extracted must wait for it. webhook.py routes each user to one worker, so a local lock is enough.
+    Waits the user must be able to interrupt, like a step section still generating, run outside the
+    update (see show_step_section).
+    """
+
+    def __init__(self, max_concurrent_updates: int = 256):
+        super().__init__(max_concurrent_updates)
+        self._locks = {}  # user_id -> [lock, updates holding or waiting for it]
+
+    async def do_process_update(self, update, coroutine):
+        user = update.effective_user if isinstance(update, Update) else None
+        if user is None:
+            await coroutine
+            return
+        entry = self._locks.setdefault(user.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[user.id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+def build_application():
+    builder = ApplicationBuilder().token(TOKEN)
+    if TELEGRAM_API_URL:
+        # Local stand-in Bot API (see benchmarks/load_webhook.py)
+        builder = builder.base_url(f"{TELEGRAM_API_URL}/bot").base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+    # Users are served concurrently (one update at a time each); scheduler.JobScheduler bounds the LLM work.
+    app = builder.concurrent_updates(PerUserUpdateProcessor()).post_init(on_startup).post_shutdown(on_shutdown).build()
 
     doc_filter = (
         filters.Document.MimeType("application/pdf") |
         filters.Document.MimeType("application/vnd.openxmlformats-officedocument.wordprocessingml.document") |
-        filters.Document.FileExtension("txt")
+        filters.Document.FileExtension("txt") |
+        filters.Document.FileExtension("zip")
     )
 
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("history", show_history))
     app.add_handler(CallbackQueryHandler(handle_pdf_request, pattern="get_pdf"))
+    app.add_handler(CallbackQueryHandler(handle_export_request, pattern="^export_"))
     app.add_handler(CallbackQueryHandler(handle_edit_decision, pattern="^edit_(yes|no)_"))
     app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), handle_message))
     app.add_handler(MessageHandler(doc_filter, handle_file))
+    return app
 
-    app.run_polling()
+def main():
+    if METRICS_PORT:
+        metrics.start_server(METRICS_PORT)
+    build_application().run_polling()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,39 @@
+"""
+API clients shared by the whole process. They are built on first use, so importing the bot
+(or starting a worker process) does not load the SDKs or open connection pools.
+"""
+from config import OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MAX_CONNECTIONS, OPENAI_KEEPALIVE_EXPIRY
+
+_openai = None
+
+
+def get_openai():
+    """
+    The AsyncOpenAI client; every request reuses its pool of keep-alive connections.
+    Retries on 429/5xx are handled by scheduler.JobScheduler, so the client does not retry on its own.
+    """
+    global _openai
+    if _openai is None:
+        import httpx
+        import openai
+
+        limits = httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        )
+        _openai = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(limits=limits),
+        )
+    return _openai
+
+
+async def close():
+    """Closes the clients built so far; the next get_* call builds a fresh one."""
+    global _openai
+    if _openai is not None:
+        await _openai.close()
+        _openai = None
@@ -1,4 +1,104 @@
 import os
+import tempfile
+from dotenv import load_dotenv
+
+load_dotenv()
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL") or None  # e.g. http://127.0.0.1:8081 for a local Bot API
+# Extra whitelisted Telegram user ids, comma separated (the admin is always allowed)
+ALLOWED_USER_IDS = {int(uid) for uid in os.getenv("ALLOWED_USER_IDS", "").split(",") if uid.strip()}
+
+# Document extraction worker pool
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "30"))
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "20"))
+EXTRACT_PAGES_PER_TASK = int(os.getenv("EXTRACT_PAGES_PER_TASK", "4"))  # longer PDFs are split across the workers
+
+# OCR of scanned PDF pages (needs the tesseract binary with the eng and ukr language packs)
+OCR_ENABLED = os.getenv("OCR_ENABLED", "1") == "1"
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "60"))
+OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", "20"))  # pages with less text than this count as scanned
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", ".cache/ocr")
+
+# Uploads are kept in memory; above UPLOAD_SPILL_BYTES they go to a temp dir that is cleaned after use
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_SPILL_BYTES = int(os.getenv("UPLOAD_SPILL_BYTES", str(5 * 1024 * 1024)))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR", os.path.join(tempfile.gettempdir(), "cvise-uploads"))
+
+# Content-addressed cache of extracted CV text
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", ".cache/text")
+TEXT_CACHE_MEMORY_ITEMS = int(os.getenv("TEXT_CACHE_MEMORY_ITEMS", "256"))
+TEXT_CACHE_DISK_MB = int(os.getenv("TEXT_CACHE_DISK_MB", "100"))
+
+# LLM backend and response cache
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
+OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # e.g. http://127.0.0.1:8765/v1 for the fake server
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))  # seconds an idle connection is kept
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "0") == "1"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ITEMS = int(os.getenv("LLM_CACHE_MAX_ITEMS", "512"))
+
+# Streaming replies into Telegram
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1") == "1"
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.5"))  # seconds between message edits
+
+# PDF rendering worker pool
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+
+# Structured (JSON schema) replies instead of free text; needs a model with json_schema support, e.g. gpt-4o
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "0") == "1"
+STRUCTURED_MAX_TOKENS = int(os.getenv("STRUCTURED_MAX_TOKENS", "1500"))
+
+# "Full CV report": one structured call for analysis, HR advice and step-by-step review (needs STRUCTURED_OUTPUT)
+FULL_REPORT_MERGED = os.getenv("FULL_REPORT_MERGED", "0") == "1"
+
+# "Step-by-step CV review": generate one section at a time and prefetch the next one while the user reads
+STEP_INCREMENTAL = os.getenv("STEP_INCREMENTAL", "1") == "1"
+# Reuse a user's section rewrite when a revision only changes case, punctuation or filler words (0 items = off)
+SECTION_CACHE_ITEMS = int(os.getenv("SECTION_CACHE_ITEMS", "1024"))
+
+# Token budget for the CV text sent to the model (see preprocess.compact_blocks)
+CV_TOKEN_BUDGET = int(os.getenv("CV_TOKEN_BUDGET", "6000"))
+
+# LLM job scheduler
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "2.0"))
+
+# Per-user bot sessions: "memory" (single process) or "sqlite" (survives restarts, shared by workers)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", ".cache/sessions.sqlite3")
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(7 * 24 * 3600)))
+SESSION_MAX_ITEMS = int(os.getenv("SESSION_MAX_ITEMS", "10000"))
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "1.0"))
+SESSION_BATCH_SIZE = int(os.getenv("SESSION_BATCH_SIZE", "50"))
+
+# Analysis history (scores per analysis, for /history); older entries are pruned automatically
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "1") == "1"
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", ".cache/history.sqlite3")
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "365"))
+
+# Webhook mode (python webhook.py)
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # public URL registered with setWebhook; unset = register nothing
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "2"))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "60"))
+
+# Prometheus metrics endpoint (0 = off); webhook workers listen on METRICS_PORT + 1 + worker index
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+TRACE_REQUESTS = os.getenv("TRACE_REQUESTS", "0") == "1"  # log a per-request timing breakdown
+
+# Batch screening (python batch.py, or a ZIP of CVs in the bot)
+BATCH_TOP_K = int(os.getenv("BATCH_TOP_K", "20"))  # CVs sent to GPT after local pre-scoring
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "200"))
+BATCH_MAX_UNZIPPED_MB = int(os.getenv("BATCH_MAX_UNZIPPED_MB", "200"))
@@ -1 +1,169 @@
-# exporter.py placeholder
\ No newline at end of file
+"""
+Report exports that are cheaper than the PDF: JSON, CSV, Markdown and DOCX.
+
+They take the parsed report (parse_gpt_output / CVReport.as_dict()) and the reply text;
+replies without a score breakdown (cover letters, the step-by-step review) export the text.
+Scores parsed from a free-text reply export the whole reply next to the score table:
+parse_gpt_output only guesses which lines belong to which section.
+
+    for chunk in exporter.iter_export("csv", data, text):   # bytes chunks, e.g. straight to a file
+        f.write(chunk)
+    buffer = exporter.export("docx", data, text)            # the whole document in memory
+
+JSON, CSV and Markdown are generated piece by piece; DOCX is a ZIP container and is built
+in one go, then yielded as a single chunk.
+"""
+import csv
+import io
+import json
+
+CSV_FIELDS = ("type", "title", "score", "text", "rewrite")
+
+
+def _has_scores(data: dict) -> bool:
+    return bool(data and (data.get("sections") or data.get("overall_score")))
+
+
+def _is_parsed(data: dict) -> bool:
+    """
+    Scores from parse_gpt_output rather than a structured reply: the summary is the reply's first line
+    and the feedback is the body split evenly across the sections, so only titles and scores are reliable.
+    """
+    return not any("key" in section or "rewrite" in section for section in data.get("sections") or [])
+
+
+def iter_json(data: dict, text: str = ""):
+    payload = dict(data) if _has_scores(data) else {}
+    if payload and _is_parsed(data):
+        payload.pop("summary", None)
+        payload["sections"] = [
+            {"title": section.get("title", ""), "score": section.get("score", "")}
+            for section in data.get("sections") or []
+        ]
+    payload["text"] = text
+    yield from json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(payload)
+
+
+def iter_csv(data: dict, text: str = ""):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def row(*values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield "\ufeff" + row(*CSV_FIELDS)  # BOM so Excel opens Cyrillic text correctly
+    if not _has_scores(data):
+        yield row("text", "", "", text, "")
+        return
+    if _is_parsed(data):
+        yield row("text", "", "", text, "")
+        for section in data.get("sections") or []:
+            yield row("section", section.get("title", ""), section.get("score", ""), "", "")
+        yield row("overall", "", data.get("overall_score", ""), "", "")
+        return
+    if data.get("summary"):
+        yield row("summary", "", "", data["summary"], "")
+    for section in data.get("sections") or []:
+        yield row("section", section.get("title", ""), section.get("score", ""),
+                  section.get("feedback", ""), section.get("rewrite", ""))
+    yield row("overall", "", data.get("overall_score", ""), "", "")
+    for recommendation in data.get("recommendations") or []:
+        yield row("recommendation", "", "", recommendation, "")
+
+
+def iter_markdown(data: dict, text: str = ""):
+    if not _has_scores(data):
+        yield text + "\n"
+        return
+    yield f"# CV report{': ' + data['name'] if data.get('name') else ''}\n\n"
+    if _is_parsed(data):
+        yield f"**Overall score: {data.get('overall_score', 0)} / 100**\n\n"
+        if data.get("sections"):
+            yield "| Section | Score |\n| --- | --- |\n"
+            yield "".join(f"| {s.get('title', '')} | {s.get('score', '')} / 10 |\n" for s in data["sections"]) + "\n"
+        yield text + "\n"
+        return
+    if data.get("summary"):
+        yield f"{data['summary']}\n\n"
+    yield f"**Overall score: {data.get('overall_score', 0)} / 100**\n\n"
+    for section in data.get("sections") or []:
+        yield f"## {section.get('title', '')} — {section.get('score', '')} / 10\n\n"
+        if section.get("feedback"):
+            yield f"{section['feedback']}\n\n"
+        if section.get("rewrite"):
+            yield "".join(f"> {line}\n" for line in section["rewrite"].splitlines()) + "\n"
+    if data.get("recommendations"):
+        yield "## Recommendations\n\n" + "".join(f"- {r}\n" for r in data["recommendations"])
+
+
+def docx_bytes(data: dict, text: str = "") -> bytes:
+    from docx import Document
+
+    document = Document()
+    if not _has_scores(data):
+        for part in text.split("\n\n"):
+            document.add_paragraph(part.strip())
+    elif _is_parsed(data):
+        document.add_heading(f"CV report{': ' + data['name'] if data.get('name') else ''}", level=1)
+        document.add_paragraph().add_run(f"Overall score: {data.get('overall_score', 0)} / 100").bold = True
+        sections = data.get("sections") or []
+        if sections:
+            table = document.add_table(rows=1, cols=2)
+            table.rows[0].cells[0].text, table.rows[0].cells[1].text = "Section", "Score"
+            for section in sections:
+                cells = table.add_row().cells
+                cells[0].text, cells[1].text = section.get("title", ""), f"{section.get('score', '')} / 10"
+        for part in text.split("\n\n"):
+            document.add_paragraph(part.strip())
+    else:
+        document.add_heading(f"CV report{': ' + data['name'] if data.get('name') else ''}", level=1)
+        if data.get("summary"):
+            document.add_paragraph(data["summary"])
+        document.add_paragraph().add_run(f"Overall score: {data.get('overall_score', 0)} / 100").bold = True
+        for section in data.get("sections") or []:
+            document.add_heading(f"{section.get('title', '')} — {section.get('score', '')} / 10", level=2)
+            if section.get("feedback"):
+                document.add_paragraph(section["feedback"])
+            if section.get("rewrite"):
+                document.add_paragraph(section["rewrite"], style="Intense Quote")
+        if data.get("recommendations"):
+            document.add_heading("Recommendations", level=2)
+            for recommendation in data["recommendations"]:
+                document.add_paragraph(recommendation, style="List Bullet")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _iter_docx(data: dict, text: str = ""):
+    yield docx_bytes(data, text)
+
+
+# format -> (chunk generator, MIME type, file extension)
+FORMATS = {
+    "json": (iter_json, "application/json", ".json"),
+    "csv": (iter_csv, "text/csv", ".csv"),
+    "md": (iter_markdown, "text/markdown", ".md"),
+    "docx": (_iter_docx, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", ".docx"),
+}
+
+
+def iter_export(fmt: str, data: dict, text: str = ""):
+    """The export as UTF-8 bytes chunks."""
+    for chunk in FORMATS[fmt][0](data or {}, text):
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def export(fmt: str, data: dict, text: str = "") -> io.BytesIO:
+    buffer = io.BytesIO()
+    for chunk in iter_export(fmt, data, text):
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+def filename(fmt: str, stem: str = "cvise_report") -> str:
+    return stem + FORMATS[fmt][2]
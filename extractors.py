@@ -1 +1,570 @@
-# extractors.py placeholder
\ No newline at end of file
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+import storage
+from config import (
+    EXTRACT_WORKERS,
+    EXTRACT_TIMEOUT,
+    EXTRACT_MAX_PAGES,
+    EXTRACT_PAGES_PER_TASK,
+    UPLOAD_SPILL_BYTES,
+    UPLOAD_TMP_DIR,
+    OCR_ENABLED,
+    OCR_DPI,
+    OCR_TIMEOUT,
+    OCR_MIN_CHARS,
+)
+from preprocess import heading_key, language_confidence, render_blocks
+
+_pool = None
+_pool_kills = 0  # pools killed by terminate_pool; tasks caught in a kill are run again once
+_ocr_available = OCR_ENABLED  # switched off for the process once tesseract turns out to be missing
+_tesseract_status = None  # "" when tesseract works, otherwise why it does not; checked once per process
+
+# Bumped whenever extraction output changes, so CV text cached by older versions is not reused.
+EXTRACT_VERSION = 2
+
+BULLET_RE = re.compile(r"^\s*[\u2022\u25aa\u25cf\u25e6\u25a0\u25cb\u25ba\u2023\u2219\u00b7*\-–](?:\s+|$)")
+CONTACT_RE = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.-]+|\+?\d[\d ()-]{7,}\d|linkedin\.com|github\.com|https?://|www\.",
+    re.IGNORECASE,
+)
+# A PDF line this much larger than the page's body text is a heading.
+HEADING_SIZE_RATIO = 1.2
+
+
+class OCRUnavailable(RuntimeError):
+    """Tesseract (or pytesseract) is not installed; raised from a worker as a plain, picklable error."""
+
+
+class ExtractionError(Exception):
+    """The document could not be read; the message is the "[❌ ...]" text shown to the user."""
+
+
+@dataclass(slots=True)
+class Block:
+    """
+    One piece of a document in reading order: kind is "heading", "bullet", "table_cell", "contact" or "text".
+    page is 0-based (always 0 for DOCX and TXT), bbox is (x0, y0, x1, y1) in PDF points
+    and cell is (table, row, column) for table cells.
+    """
+    kind: str
+    text: str
+    page: int = 0
+    bbox: tuple = None
+    cell: tuple = None
+
+
+@dataclass
+class Upload:
+    """
+    An uploaded document held in memory, or spilled to UPLOAD_TMP_DIR when it is large.
+    """
+    file_name: str
+    data: bytes = None
+    path: str = None
+    bytes_written: int = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data is not None else os.path.getsize(self.path)
+
+    def cleanup(self):
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+def make_upload(file_name: str, data: bytes, spill_bytes: int = UPLOAD_SPILL_BYTES) -> Upload:
+    if len(data) <= spill_bytes:
+        return Upload(file_name=file_name, data=bytes(data))
+    os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+    suffix = os.path.splitext(file_name)[1].lower()
+    fd, path = tempfile.mkstemp(dir=UPLOAD_TMP_DIR, suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return Upload(file_name=file_name, path=path, bytes_written=len(data))
+
+
+def purge_spill_dir(max_age: float = 3600):
+    """Removes spilled uploads left behind by a crashed process."""
+    if not os.path.isdir(UPLOAD_TMP_DIR):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(UPLOAD_TMP_DIR):
+        path = os.path.join(UPLOAD_TMP_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _source_args(source):
+    """(file_name, path_or_bytes) for a path or an Upload, in a form cheap to send to a worker."""
+    if isinstance(source, Upload):
+        return source.file_name, source.path or source.data
+    return source, source
+
+
+def _open_pdf(file_path, data: bytes = None):
+    import fitz  # PyMuPDF
+
+    return fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(file_path)
+
+
+def _page_hash(doc, page) -> str:
+    """Identifies a page by its content stream and the raw bytes of its images, without rendering it."""
+    h = hashlib.sha256(page.read_contents())
+    for image in page.get_images(full=True):
+        h.update(doc.xref_stream_raw(image[0]) or b"")
+    return h.hexdigest()
+
+
+def line_kind(text: str) -> str:
+    """Block kind of a line of plain text (TXT files, OCR output, untyped DOCX paragraphs)."""
+    if BULLET_RE.match(text):
+        return "bullet"
+    if heading_key(text):
+        return "heading"
+    if len(text) <= 120 and CONTACT_RE.search(text):
+        return "contact"
+    return "text"
+
+
+def text_blocks(text: str, page: int = 0) -> list:
+    """Blocks of plain text: consecutive text lines form one block, anything else is a block of its own."""
+    blocks = []
+    joinable = False
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            joinable = False
+            continue
+        kind = line_kind(line)
+        if kind == "bullet":
+            line = BULLET_RE.sub("", line, count=1)
+        if kind == "text" and joinable:
+            blocks[-1].text += "\n" + line
+        else:
+            blocks.append(Block(kind, line, page))
+        joinable = kind == "text"
+    return blocks
+
+
+def _docx_paragraph_block(paragraph, table_cell: tuple = None):
+    text = paragraph.text.strip()
+    if not text:
+        return None
+    if table_cell:
+        return Block("table_cell", text, cell=table_cell)
+    style = paragraph.style.name if paragraph.style is not None else ""
+    p_pr = paragraph._p.pPr
+    if style.startswith(("Heading", "Title")):
+        return Block("heading", text)
+    if "List" in style or (p_pr is not None and p_pr.numPr is not None):
+        return Block("bullet", BULLET_RE.sub("", text, count=1))
+    kind = line_kind(text)
+    return Block(kind, BULLET_RE.sub("", text, count=1) if kind == "bullet" else text)
+
+
+def _docx_blocks(container, blocks: list, tables: list):
+    """
+    Paragraphs and tables of a DOCX body, header or table cell, in document order.
+    Cells holding a single paragraph are table cells; cells with more are layout and are read as paragraphs.
+    """
+    from docx.table import Table
+
+    for item in container.iter_inner_content():
+        if not isinstance(item, Table):
+            block = _docx_paragraph_block(item)
+            if block:
+                blocks.append(block)
+            continue
+        table = len(tables)
+        tables.append(item)
+        seen = set()
+        for r, row in enumerate(item.rows):
+            for c, cell in enumerate(row.cells):
+                if cell._tc in seen:
+                    continue  # merged cells repeat across the columns (and rows) they span
+                seen.add(cell._tc)
+                paragraphs = [p for p in cell.paragraphs if p.text.strip()]
+                if len(paragraphs) == 1 and not cell.tables:
+                    blocks.append(_docx_paragraph_block(paragraphs[0], (table, r, c)))
+                else:
+                    _docx_blocks(cell, blocks, tables)
+
+
+def _pdf_reading_order(lines: list, width: float) -> list:
+    """
+    Sorts the text lines of a PDF page top to bottom, left to right. When the page has two columns
+    (a gutter that only full-width lines cross, with at least a fifth of the text on each side),
+    each column is read to the end before the next, between full-width lines.
+    """
+    def chars(items):
+        return sum(len(line["text"]) for line in items)
+
+    lines = sorted(lines, key=lambda line: (round(line["bbox"][1] / 3), line["bbox"][0]))
+    total = chars(lines)
+    for x in (width * f for f in (0.5, 0.45, 0.55, 0.4, 0.6, 0.35, 0.65, 0.3, 0.7)):
+        left = chars(line for line in lines if line["bbox"][2] <= x)
+        right = chars(line for line in lines if line["bbox"][0] >= x)
+        if min(left, right) >= 0.2 * total and left + right >= 0.8 * total:
+            break
+    else:
+        return lines
+
+    ordered, columns = [], ([], [])
+    for line in lines:
+        if line["bbox"][2] <= x:
+            columns[0].append(line)
+        elif line["bbox"][0] >= x:
+            columns[1].append(line)
+        else:
+            ordered += columns[0] + columns[1] + [line]
+            columns = ([], [])
+    return ordered + columns[0] + columns[1]
+
+
+def _pdf_page_blocks(page) -> list:
+    """Typed blocks of one PDF page, classified by line: bullet markers, font size, known headings, contacts."""
+    import fitz
+
+    lines = []
+    sizes = Counter()
+    for number, b in enumerate(page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]):
+        for line in b["lines"]:
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                size = max(span["size"] for span in line["spans"])
+                sizes[round(size)] += len(text)
+                lines.append({"text": text, "size": size, "bbox": line["bbox"], "block": number})
+    body_size = sizes.most_common(1)[0][0] if sizes else 0
+
+    blocks = []
+    previous = None  # PyMuPDF block of the last line, when that line can take a continuation
+    bullet_pending = False  # a bullet glyph set as a line of its own
+    for line in _pdf_reading_order(lines, page.rect.width):
+        text, bbox = line["text"], line["bbox"]
+        kind = line_kind(text)
+        if kind == "bullet":
+            text = BULLET_RE.sub("", text, count=1)
+            if not text:
+                bullet_pending = True
+                continue
+        elif bullet_pending:
+            kind = "bullet"
+        elif kind == "text" and len(text) <= 60 and body_size and line["size"] >= body_size * HEADING_SIZE_RATIO:
+            kind = "heading"
+        bullet_pending = False
+        if kind == "text" and previous == line["block"]:
+            last = blocks[-1]
+            # A wrapped bullet is one item; plain text keeps its line breaks for preprocess._trim.
+            last.text += (" " if last.kind == "bullet" else "\n") + text
+            last.bbox = tuple(round(v, 1) for v in fitz.Rect(last.bbox) | bbox)
+            continue
+        blocks.append(Block(kind, text, page.number, tuple(round(v, 1) for v in bbox)))
+        previous = line["block"] if kind in ("text", "bullet") else None
+    return blocks
+
+
+def extract_pdf_blocks(file_path, start: int, stop: int, data: bytes = None) -> tuple:
+    """
+    Blocks of PDF pages [start, stop), {page index: page hash} for pages that look scanned
+    (less than OCR_MIN_CHARS of text) and the document's page count. Runs inside a worker process.
+    """
+    with _open_pdf(file_path, data) as doc:
+        blocks, scanned = [], {}
+        for page in doc.pages(start, min(stop, doc.page_count)):
+            page_blocks = _pdf_page_blocks(page)
+            if sum(len(block.text) for block in page_blocks) < OCR_MIN_CHARS:
+                scanned[page.number] = _page_hash(doc, page)
+            blocks += page_blocks
+        return blocks, scanned, doc.page_count
+
+
+def extract_blocks(file_path, max_pages: int = EXTRACT_MAX_PAGES, data: bytes = None) -> list:
+    """
+    Synchronous PDF/DOCX/TXT extraction into Blocks, without OCR. Runs inside a worker process.
+    file_path only decides the format when the document is passed in memory as data.
+    Raises ExtractionError when the file cannot be read.
+    """
+    ext = file_path.lower()
+    if ext.endswith(".pdf"):
+        return extract_pdf_blocks(file_path, 0, max_pages, data)[0]
+    elif ext.endswith(".docx"):
+        try:
+            from docx import Document
+            doc = Document(io.BytesIO(data) if data is not None else file_path)
+            blocks, tables = [], []
+            header = doc.sections[0].header if len(doc.sections) else None
+            if header is not None and not header.is_linked_to_previous:
+                # Templates often keep the name and contacts in the page header.
+                _docx_blocks(header, blocks, tables)
+            _docx_blocks(doc, blocks, tables)
+            return blocks
+        except Exception as e:
+            raise ExtractionError(f"[❌ Error reading DOCX file: {e}]")
+    else:
+        try:
+            if data is not None:
+                return text_blocks(data.decode("utf-8"))
+            with open(file_path, "r", encoding="utf-8") as f:
+                return text_blocks(f.read())
+        except Exception as e:
+            raise ExtractionError(f"[❌ Error reading TXT file: {e}]")
+
+
+def extract_text(file_path, max_pages: int = EXTRACT_MAX_PAGES, data: bytes = None) -> str:
+    """Synchronous PDF/DOCX/TXT text extraction (extract_blocks rendered as text)."""
+    try:
+        return render_blocks(extract_blocks(file_path, max_pages, data))
+    except ExtractionError as e:
+        return str(e)
+
+
+def tesseract_error() -> str:
+    """Why OCR cannot run in this process ("" if it can): pytesseract, Pillow or the tesseract binary missing."""
+    global _tesseract_status
+    if _tesseract_status is None:
+        try:
+            import pytesseract
+            import PIL  # noqa: F401
+            pytesseract.get_tesseract_version()
+            _tesseract_status = ""
+        except ImportError as e:
+            _tesseract_status = f"OCR dependencies are missing: {e}"
+        except Exception as e:  # TesseractNotFoundError, or a binary that does not run
+            _tesseract_status = str(e) or "tesseract is not available"
+    return _tesseract_status
+
+
+def ocr_page(file_path, data: bytes, index: int, lang: str, dpi: int = OCR_DPI) -> str:
+    """Rasterizes one PDF page and runs tesseract on it. Runs inside a worker process."""
+    # Checked before rendering: a 300 dpi pixmap costs far more than finding out tesseract is missing.
+    error = tesseract_error()
+    if error:
+        raise OCRUnavailable(error)
+
+    import fitz
+    import pytesseract
+    from PIL import Image
+
+    with _open_pdf(file_path, data) as doc:
+        pix = doc[index].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    try:
+        return pytesseract.image_to_string(image, lang=lang)
+    except pytesseract.TesseractNotFoundError as e:
+        raise OCRUnavailable(str(e))
+    except pytesseract.TesseractError:
+        if lang == "eng":
+            raise
+        # Most often a missing language pack: English still reads the Latin parts.
+        logging.warning(f"Tesseract failed with lang={lang}, retrying with eng")
+        return pytesseract.image_to_string(image, lang="eng")
+
+
+def ocr_language(partial_text: str) -> str:
+    """Tesseract languages for a scanned CV, guessed from whatever text layer it has."""
+    lang, confidence = language_confidence(partial_text)
+    if lang == "uk":
+        return "ukr+eng"
+    # No text layer at all, or English mixed with a fair amount of Cyrillic.
+    return "eng" if confidence >= 0.9 else "eng+ukr"
+
+
+def _warm_worker():
+    import fitz  # noqa: F401 — PyMuPDF is loaded when a worker starts, not on its first document
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, initializer=_warm_worker)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def terminate_pool():
+    """
+    Kills the workers and drops the pool. A worker keeps parsing a file after its caller stopped waiting,
+    so a few files that overrun the timeout would otherwise hold every worker and make the uploads queued
+    behind them time out too. Other files in the pool fail with BrokenProcessPool (see extract_blocks_async).
+    """
+    global _pool, _pool_kills
+    if _pool is None:
+        return
+    pool, _pool = _pool, None
+    _pool_kills += 1
+    for process in list((pool._processes or {}).values()):  # ProcessPoolExecutor has no public kill before 3.14
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _page_ranges(start: int, stop: int, pages_per_task: int) -> list:
+    """Splits pages [start, stop) into at most EXTRACT_WORKERS ranges of at least pages_per_task pages."""
+    tasks = max(1, min(EXTRACT_WORKERS, -(-(stop - start) // pages_per_task)))
+    step = -(-(stop - start) // tasks)
+    return [(first, min(first + step, stop)) for first in range(start, stop, step)]
+
+
+async def _pdf_blocks_async(file_name: str, payload, max_pages: int, pages_per_task: int) -> tuple:
+    """
+    extract_pdf_blocks across the worker pool: the first pages_per_task pages (all of a typical CV)
+    in one task, which also reports the page count, then the rest split between the workers.
+    """
+    loop = asyncio.get_running_loop()
+    path, data = (payload, None) if isinstance(payload, str) else (file_name, payload)
+    first = min(pages_per_task, max_pages)
+    blocks, scanned, page_count = await loop.run_in_executor(get_pool(), extract_pdf_blocks, path, 0, first, data)
+    last = min(max_pages, page_count)
+    if last > first:
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(get_pool(), extract_pdf_blocks, path, start, stop, data)
+            for start, stop in _page_ranges(first, last, pages_per_task)
+        ))
+        for part_blocks, part_scanned, _ in parts:
+            blocks += part_blocks
+            scanned.update(part_scanned)
+    return blocks, scanned
+
+
+async def extract_blocks_async(
+    source,
+    timeout: float = EXTRACT_TIMEOUT,
+    max_pages: int = EXTRACT_MAX_PAGES,
+    pages_per_task: int = EXTRACT_PAGES_PER_TASK,
+) -> list:
+    """
+    Parses a file path or an Upload into Blocks in the worker pool so the event loop keeps serving
+    other updates. Long PDFs are split into page ranges parsed in parallel; pages without a text layer
+    are OCRed (see ocr_pdf_pages). Raises ExtractionError with the message to show the user.
+    """
+    file_name, payload = _source_args(source)
+    for attempt in range(2):
+        kills = _pool_kills
+        try:
+            blocks = await _extract_blocks(file_name, payload, timeout, max_pages, pages_per_task)
+            break
+        except asyncio.TimeoutError:
+            logging.warning(f"Extraction of {file_name} timed out after {timeout}s, restarting the pool")
+            terminate_pool()
+            raise ExtractionError(f"[❌ Timed out reading file after {timeout:.0f}s]")
+        except BrokenProcessPool:
+            if _pool_kills != kills and not attempt:
+                # The pool was killed because another file overran its timeout, not because of this one.
+                logging.info(f"Extraction pool was restarted while reading {file_name}, retrying")
+                continue
+            # A worker died (e.g. a malformed PDF crashed MuPDF) — start a fresh pool for the next upload.
+            logging.error(f"Extraction pool broke while reading {file_name}, restarting it")
+            shutdown_pool()
+            raise ExtractionError("[❌ Error reading file: the document could not be parsed]")
+
+    if not any(block.text.strip() for block in blocks):
+        # Nothing for GPT to read; say so instead of spending a call on an empty CV.
+        raise ExtractionError("[❌ No text found in the PDF. If it is a scan, please send a text-based PDF or DOCX]")
+    return blocks
+
+
+async def _extract_blocks(file_name: str, payload, timeout: float, max_pages: int, pages_per_task: int) -> list:
+    loop = asyncio.get_running_loop()
+    if not file_name.lower().endswith(".pdf"):
+        call = (payload, max_pages) if isinstance(payload, str) else (file_name, max_pages, payload)
+        return await asyncio.wait_for(loop.run_in_executor(get_pool(), extract_blocks, *call), timeout=timeout)
+    blocks, scanned = await asyncio.wait_for(
+        _pdf_blocks_async(file_name, payload, max_pages, pages_per_task), timeout=timeout
+    )
+    if scanned and _ocr_available:
+        texts = await ocr_pdf_pages(file_name, payload, scanned, "\n".join(b.text for b in blocks))
+        if texts:
+            blocks = [b for b in blocks if b.page not in texts]
+            for index, text in texts.items():
+                blocks += text_blocks(text, index)
+            blocks.sort(key=lambda b: b.page)  # stable: keeps the reading order within each page
+    return blocks
+
+
+async def extract_text_async(source, timeout: float = EXTRACT_TIMEOUT, max_pages: int = EXTRACT_MAX_PAGES) -> str:
+    """extract_blocks_async rendered as text; errors come back as the "[❌ ...]" message."""
+    try:
+        return render_blocks(await extract_blocks_async(source, timeout, max_pages))
+    except ExtractionError as e:
+        return str(e)
+
+
+async def ocr_pdf_pages(file_name: str, payload, scanned: dict, partial_text: str = "",
+                        timeout: float = OCR_TIMEOUT) -> dict:
+    """
+    {page index: text} for each scanned page {index: page hash}: from storage.ocr_cache when the same
+    page was seen before, otherwise by OCRing the pages in parallel across the worker pool.
+    Pages that could not be OCRed are left out.
+    """
+    global _ocr_available
+    loop = asyncio.get_running_loop()
+    lang = ocr_language(partial_text)
+    keys = {index: f"{page_hash}-{lang}-d{OCR_DPI}" for index, page_hash in scanned.items()}
+    texts, missing = {}, []
+    for index, key in keys.items():
+        cached = await asyncio.to_thread(storage.ocr_cache.get, key)
+        if cached:
+            texts[index] = cached["text"]
+        else:
+            missing.append(index)
+    if not missing:
+        return texts
+    error = await asyncio.to_thread(tesseract_error)
+    if error:
+        logging.warning(f"OCR disabled: {error}")
+        _ocr_available = False
+        return texts
+
+    path, data = (payload, None) if isinstance(payload, str) else (file_name, payload)
+    with metrics.span("ocr"):
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*(
+                    loop.run_in_executor(get_pool(), ocr_page, path, data, index, lang) for index in missing
+                )),
+                timeout=timeout,
+            )
+        except OCRUnavailable as e:
+            logging.warning(f"OCR disabled: {e}")
+            _ocr_available = False
+            return texts
+        except asyncio.TimeoutError:
+            logging.warning(f"OCR of {len(missing)} pages of {file_name} timed out after {timeout}s, restarting the pool")
+            terminate_pool()
+            return texts
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            logging.error(f"OCR of {file_name} failed: {e}")
+            return texts
+
+    for index, text in zip(missing, results):
+        texts[index] = text
+        await asyncio.to_thread(storage.ocr_cache.put, keys[index], {"text": text})
+    logging.info(f"OCR ({lang}) of {file_name}: {len(missing)} pages, {len(scanned) - len(missing)} from cache")
+    return texts
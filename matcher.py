@@ -0,0 +1,211 @@
+"""
+Local CV–vacancy matching without an LLM call.
+
+Texts become sparse hashed vectors of word uni/bigrams and character 4-grams (the latter make
+Ukrainian inflections and "PostgreSQL"/"Postgres" style variants overlap), weighted by TF-IDF
+and compared with cosine similarity in NumPy. Known skills are recognised from SKILL_ALIASES.
+
+    result = match(resume_text, vacancy_text)
+    result.score, result.matched_skills, result.missing_skills
+
+For many CVs against one vacancy, MatchIndex fits the IDF weights on all of them first.
+"""
+import math
+import re
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+
+DIM = 1 << 20  # hashing space; collisions are rare at CV sizes
+CHAR_NGRAM = 4
+# Cosine similarity of a good CV–vacancy pair rarely exceeds this; it maps to a full similarity score.
+SIMILARITY_CEILING = 0.5
+SKILL_WEIGHT = 0.6  # share of the match score coming from skill coverage, the rest from text similarity
+
+WORD_RE = re.compile(r"[a-zа-яёіїєґ0-9][a-zа-яёіїєґ0-9+#]*(?:[.\-'][a-zа-яёіїєґ0-9+#]+)*", re.I)
+STOPWORDS = {
+    "and", "the", "for", "with", "you", "our", "are", "will", "your", "from", "that", "this", "have", "has",
+    "who", "all", "one", "two", "own", "can", "not", "but", "per", "job", "role", "team", "work", "working",
+    "years", "year", "experience", "plus", "must", "should", "into", "about", "their", "they", "them", "what",
+    "requirements", "responsibilities", "skills", "knowledge", "ability", "strong", "good", "great", "etc",
+    "та", "для", "або", "від", "при", "що", "як", "які", "який", "яка", "роботи", "досвід", "років", "року",
+    "знання", "вміння", "буде", "вимоги", "обов'язки", "наша", "наші", "команда", "також", "это", "и", "в", "на",
+}
+
+# canonical skill -> aliases (lowercase); English and Ukrainian spellings
+SKILL_ALIASES = {
+    "python": ["python"], "java": ["java"], "javascript": ["javascript", "js"], "typescript": ["typescript"],
+    "go": ["golang"], "c++": ["c++", "cpp"], "c#": ["c#", "csharp"], ".net": [".net", "dotnet"], "php": ["php"],
+    "ruby": ["ruby"], "kotlin": ["kotlin"], "swift": ["swift"], "rust": ["rust"], "scala": ["scala"],
+    "sql": ["sql"], "postgresql": ["postgresql", "postgres"], "mysql": ["mysql"], "mongodb": ["mongodb", "mongo"],
+    "redis": ["redis"], "elasticsearch": ["elasticsearch"], "kafka": ["kafka"], "rabbitmq": ["rabbitmq"],
+    "spark": ["spark", "pyspark"], "airflow": ["airflow"], "dbt": ["dbt"], "pandas": ["pandas"], "numpy": ["numpy"],
+    "django": ["django"], "flask": ["flask"], "fastapi": ["fastapi"], "react": ["react", "react.js", "reactjs"],
+    "angular": ["angular"], "vue": ["vue", "vue.js"], "node.js": ["node.js", "nodejs"],
+    "spring": ["spring boot", "spring framework"], "aws": ["aws", "amazon web services"], "azure": ["azure"],
+    "gcp": ["gcp", "google cloud"], "docker": ["docker"], "kubernetes": ["kubernetes", "k8s"],
+    "terraform": ["terraform"], "ansible": ["ansible"], "ci/cd": ["ci/cd", "cicd", "continuous integration"],
+    "git": ["git"], "linux": ["linux"], "rest api": ["rest api", "restful"], "graphql": ["graphql"],
+    "microservices": ["microservices", "мікросервіси"], "machine learning": ["machine learning", "ml", "машинне навчання"],
+    "deep learning": ["deep learning"], "pytorch": ["pytorch"], "tensorflow": ["tensorflow"], "nlp": ["nlp"],
+    "data analysis": ["data analysis", "аналіз даних"], "power bi": ["power bi"], "tableau": ["tableau"],
+    "excel": ["excel"], "figma": ["figma"], "jira": ["jira"], "agile": ["agile"], "scrum": ["scrum"],
+    "testing": ["testing", "qa", "тестування"], "selenium": ["selenium"], "pytest": ["pytest"],
+    "project management": ["project management", "управління проектами", "управління проєктами"],
+    "product management": ["product management"], "stakeholder management": ["stakeholder management"],
+    "leadership": ["leadership", "team lead", "лідерство"], "mentoring": ["mentoring", "mentor", "менторство"],
+    "communication": ["communication", "комунікація", "комунікативні"], "english": ["english", "англійська"],
+    "ukrainian": ["ukrainian", "українська"], "sales": ["sales", "продажі"], "marketing": ["marketing", "маркетинг"],
+    "seo": ["seo"], "accounting": ["accounting", "бухгалтерія", "бухгалтерський облік"], "recruiting": ["recruiting", "рекрутинг"],
+}
+_ALIAS_TO_SKILL = {alias: skill for skill, aliases in SKILL_ALIASES.items() for alias in aliases}
+_SKILL_RE = re.compile(
+    r"(?<![\w+#.])(" + "|".join(re.escape(a) for a in sorted(_ALIAS_TO_SKILL, key=len, reverse=True)) + r")(?![\w+#])",
+    re.I,
+)
+
+
+@dataclass
+class MatchResult:
+    score: int  # 0–100
+    similarity: float  # TF-IDF cosine, 0–1
+    skill_coverage: float  # share of the vacancy's skills found in the CV, 0–1
+    matched_skills: list = field(default_factory=list)
+    missing_skills: list = field(default_factory=list)
+    missing_keywords: list = field(default_factory=list)  # frequent vacancy terms outside SKILL_ALIASES
+    elapsed_ms: float = 0.0
+
+    def summary(self) -> str:
+        lines = [f"⚡ Quick match: {self.score}/100"]
+        if self.matched_skills:
+            lines.append(f"✅ Matched skills: {', '.join(self.matched_skills)}")
+        if self.missing_skills:
+            lines.append(f"❗ Missing skills: {', '.join(self.missing_skills)}")
+        if self.missing_keywords:
+            lines.append(f"🔎 Vacancy keywords not in your CV: {', '.join(self.missing_keywords)}")
+        return "\n".join(lines)
+
+    def prompt_note(self) -> str:
+        """Facts for the vacancy prompt, so the model can spend its words on the gaps."""
+        return (
+            f"Local pre-analysis (computed automatically; verify it rather than repeat it): match score {self.score}/100; "
+            f"skills in both: {', '.join(self.matched_skills) or 'none found'}; "
+            f"vacancy skills missing from the CV: {', '.join(self.missing_skills) or 'none found'}; "
+            f"other vacancy keywords missing: {', '.join(self.missing_keywords) or 'none'}."
+        )
+
+
+def words(text: str) -> list:
+    return [w for w in (m.group(0).lower() for m in WORD_RE.finditer(text)) if len(w) > 1 and w not in STOPWORDS]
+
+
+def keywords(text: str) -> set:
+    return {w for w in words(text) if len(w) > 2}
+
+
+def extract_skills(text: str) -> set:
+    return {_ALIAS_TO_SKILL[m.group(1).lower()] for m in _SKILL_RE.finditer(text)}
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) & (DIM - 1)
+
+
+def term_counts(text: str) -> tuple:
+    """(hashed feature indices, counts) for word unigrams, bigrams and in-word character 4-grams."""
+    import numpy as np  # loaded on the first match, not when the bot starts
+
+    tokens = words(text)
+    counts = Counter(tokens)
+    counts.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    for token, n in Counter(tokens).items():
+        padded = f"<{token}>"
+        for i in range(max(len(padded) - CHAR_NGRAM + 1, 1)):
+            counts["#" + padded[i:i + CHAR_NGRAM]] += n
+    indices = np.fromiter((_hash(f) for f in counts), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    # Merge hash collisions so indices are unique and sorted.
+    unique, inverse = np.unique(indices, return_inverse=True)
+    return unique, np.bincount(inverse, weights=values).astype(np.float32)
+
+
+def _weigh(terms: tuple, idf: dict = None) -> tuple:
+    import numpy as np
+
+    indices, counts = terms
+    weights = 1.0 + np.log(counts)  # sublinear TF
+    if idf is not None:
+        weights *= np.fromiter((idf.get(i, idf[None]) for i in indices.tolist()), dtype=np.float32, count=len(indices))
+    norm = np.linalg.norm(weights)
+    return indices, (weights / norm if norm else weights)
+
+
+def cosine(a: tuple, b: tuple) -> float:
+    import numpy as np
+
+    _, ia, ib = np.intersect1d(a[0], b[0], assume_unique=True, return_indices=True)
+    return float(np.dot(a[1][ia], b[1][ib]))
+
+
+def _result(resume_text: str, vacancy_text: str, similarity: float, vacancy_skills: set = None,
+            vacancy_keywords: set = None, started: float = None) -> MatchResult:
+    vacancy_skills = extract_skills(vacancy_text) if vacancy_skills is None else vacancy_skills
+    resume_skills = extract_skills(resume_text)
+    matched = sorted(vacancy_skills & resume_skills)
+    missing = sorted(vacancy_skills - resume_skills)
+    if vacancy_skills:
+        coverage = len(matched) / len(vacancy_skills)
+    else:
+        # No known skills in the vacancy: fall back to plain keyword coverage.
+        vacancy_keywords = keywords(vacancy_text) if vacancy_keywords is None else vacancy_keywords
+        coverage = len(vacancy_keywords & keywords(resume_text)) / len(vacancy_keywords) if vacancy_keywords else 0.0
+    similarity = max(0.0, min(similarity, 1.0))
+    score = 100 * (SKILL_WEIGHT * coverage + (1 - SKILL_WEIGHT) * min(similarity / SIMILARITY_CEILING, 1.0))
+    return MatchResult(
+        score=round(score),
+        similarity=similarity,
+        skill_coverage=coverage,
+        matched_skills=matched,
+        missing_skills=missing,
+        missing_keywords=_missing_keywords(resume_text, vacancy_text),
+        elapsed_ms=(time.perf_counter() - started) * 1000 if started else 0.0,
+    )
+
+
+def _missing_keywords(resume_text: str, vacancy_text: str, limit: int = 8) -> list:
+    skill_words = {w for alias in _ALIAS_TO_SKILL for w in alias.split()}
+    resume_words = keywords(resume_text)
+    counts = Counter(w for w in words(vacancy_text) if len(w) > 3 and w not in skill_words and not w.isdigit())
+    return [w for w, _ in counts.most_common() if w not in resume_words][:limit]
+
+
+def match(resume_text: str, vacancy_text: str) -> MatchResult:
+    """One CV against one vacancy (TF weighting only: two documents are too few for IDF)."""
+    started = time.perf_counter()
+    similarity = cosine(_weigh(term_counts(resume_text)), _weigh(term_counts(vacancy_text)))
+    return _result(resume_text, vacancy_text, similarity, started=started)
+
+
+class MatchIndex:
+    """Scores many CVs against one vacancy, with IDF fitted on the CVs and the vacancy together."""
+
+    def __init__(self, vacancy_text: str, resumes: list):
+        self.vacancy_text = vacancy_text
+        self.vacancy_skills = extract_skills(vacancy_text)
+        self.vacancy_keywords = keywords(vacancy_text)
+        terms = [term_counts(text) for text in resumes]
+        vacancy_terms = term_counts(vacancy_text)
+        n = len(terms) + 1
+        df = Counter()
+        for indices, _ in terms + [vacancy_terms]:
+            df.update(indices.tolist())
+        self.idf = {i: math.log((1 + n) / (1 + d)) + 1 for i, d in df.items()}
+        self.idf[None] = math.log(1 + n) + 1  # unseen terms
+        self.vacancy = _weigh(vacancy_terms, self.idf)
+        self.resumes = [_weigh(t, self.idf) for t in terms]
+
+    def score(self, i: int, resume_text: str) -> MatchResult:
+        started = time.perf_counter()
+        return _result(resume_text, self.vacancy_text, cosine(self.resumes[i], self.vacancy),
+                       self.vacancy_skills, self.vacancy_keywords, started)
@@ -0,0 +1,197 @@
+"""
+Timing spans and token counters for the hot path, exported in the Prometheus text format.
+
+    with metrics.trace("resume", user_id):     # one bot request; spans inside are labelled with its mode
+        with metrics.span("extract"):
+            ...
+
+start_server() serves the histograms on http://METRICS_HOST:port/metrics. With TRACE_REQUESTS=1
+every trace also logs a one-line breakdown of where its time went.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_HOST, TRACE_REQUESTS
+
+# Seconds; LLM calls sit in the upper half, extraction and rendering in the lower.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+_lock = threading.Lock()  # the HTTP server thread reads while the bot loop writes
+_registry = []
+
+
+def _format_labels(labels: tuple) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple = BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series = {}  # sorted label items -> [bucket counts, sum, count]
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                prefix = _format_labels(key) + "," if key else ""
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{_format_labels(key)}}} {total:.6f}")
+                lines.append(f"{self.name}_count{{{_format_labels(key)}}} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def expose(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{_format_labels(key)}}} {value}")
+        return lines
+
+
+stage_seconds = Histogram("cvise_stage_seconds", "Time spent in one stage of a bot request.")
+request_seconds = Histogram("cvise_request_seconds", "End-to-end time of a bot request.")
+first_token_seconds = Histogram("cvise_llm_first_token_seconds", "Time until the first streamed token arrived.")
+llm_tokens = Counter("cvise_llm_tokens_total", "Tokens reported by the OpenAI API.")
+llm_calls = Counter("cvise_llm_calls_total", "OpenAI API calls.")
+section_cache_lookups = Counter("cvise_section_cache_lookups_total", "Section rewrite cache lookups by result.")
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+def current_mode() -> str:
+    trace = _trace.get()
+    return trace["mode"] if trace else ""
+
+
+def observe(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage=stage, mode=current_mode())
+    trace = _trace.get()
+    if trace is not None:
+        trace["spans"].append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """Decorator form of span() for plain functions."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int):
+    mode = current_mode()
+    llm_calls.inc(mode=mode)
+    llm_tokens.inc(prompt_tokens, kind="prompt", mode=mode)
+    llm_tokens.inc(completion_tokens, kind="completion", mode=mode)
+    trace = _trace.get()
+    if trace is not None:
+        trace["tokens"][0] += prompt_tokens
+        trace["tokens"][1] += completion_tokens
+
+
+@contextmanager
+def trace(mode: str, user_id=None):
+    """One bot request. Spans recorded inside (including tasks it starts) are labelled with mode."""
+    current = {"mode": mode or "", "spans": [], "tokens": [0, 0]}
+    token = _trace.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        _trace.reset(token)
+        elapsed = time.perf_counter() - start
+        request_seconds.observe(elapsed, mode=current["mode"])
+        if TRACE_REQUESTS:
+            logging.info(f"Trace {current['mode'] or '-'} user={user_id}: {format_trace(current, elapsed)}")
+
+
+def format_trace(current: dict, elapsed: float) -> str:
+    totals = {}
+    for stage, seconds in current["spans"]:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    parts = [f"{stage} {seconds:.2f}s" for stage, seconds in totals.items()]
+    prompt_tokens, completion_tokens = current["tokens"]
+    if prompt_tokens or completion_tokens:
+        parts.append(f"tokens {prompt_tokens}+{completion_tokens}")
+    return f"total {elapsed:.2f}s | " + ", ".join(parts)
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"Metrics on http://{host}:{server.server_port}/metrics")
+    return server
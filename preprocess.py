@@ -0,0 +1,249 @@
+import logging
+import re
+import string
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+from config import OPENAI_MODEL, CV_TOKEN_BUDGET
+
+PAGE_BREAK = "\f"
+
+PAGE_NUMBER_RE = re.compile(r"^(?:page|сторінка|стор\.)?\s*[-–]?\s*\d{1,3}\s*(?:(?:/|of|з|із)\s*\d{1,3})?\s*[-–]?$", re.IGNORECASE)
+
+# Headings that start a CV section, and how much the section is worth keeping (higher = keep longer).
+SECTION_HEADINGS = {
+    "summary": (("summary", "profile", "about me", "professional summary", "objective", "про мене", "профіль", "резюме"), 90),
+    "skills": (("skills", "key skills", "technical skills", "qualifications", "навички", "ключові навички", "кваліфікація"), 80),
+    "experience": (("experience", "work experience", "employment history", "professional experience", "досвід", "досвід роботи"), 100),
+    "education": (("education", "освіта"), 60),
+    "projects": (("projects", "проєкти", "проекти"), 50),
+    "certifications": (("certifications", "certificates", "courses", "сертифікати", "курси"), 40),
+    "languages": (("languages", "мови", "знання мов"), 40),
+    "interests": (("interests", "hobbies", "інтереси", "хобі"), 10),
+    "references": (("references", "рекомендації"), 5),
+}
+HEADING_LOOKUP = {alias: key for key, (aliases, _) in SECTION_HEADINGS.items() for alias in aliases}
+# Text before the first heading is usually the name and contact block.
+HEADER_PRIORITY = 95
+# Sections valued below this are dropped whole before anything else is trimmed.
+DROPPABLE_BELOW = 50
+SECTION_FLOOR_TOKENS = 150
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.warning(f"tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+
+
+# Letters counted by the language detector; the whole of А-я plus Ё and the Ukrainian-only letters.
+CYRILLIC_LETTERS = frozenset(map(chr, range(0x410, 0x450))) | frozenset("ЁёІіЇїЄєҐґ")
+UKRAINIAN_LETTERS = frozenset("ІіЇїЄєҐґ")
+LATIN_LETTERS = frozenset(string.ascii_letters)
+# Longer texts are sampled: this many characters from the start, the middle and the end.
+LANGUAGE_SAMPLE_CHARS = 4000
+
+
+def _language_sample(text: str) -> str:
+    size = LANGUAGE_SAMPLE_CHARS
+    if len(text) <= 3 * size:
+        return text
+    middle = (len(text) - size) // 2
+    return text[:size] + text[middle:middle + size] + text[-size:]
+
+
+def language_confidence(text: str) -> tuple:
+    """
+    ("uk" | "en", confidence 0–1) from one counting pass over a sample of the text.
+    Any Ukrainian-only letter, or more Cyrillic than Latin letters, means "uk";
+    confidence is the share of letters written in the chosen script.
+    """
+    cyrillic = latin = ukrainian = 0
+    # Counter(str) counts in C; the loop below only visits distinct characters.
+    for char, n in Counter(_language_sample(text or "")).items():
+        if char in CYRILLIC_LETTERS:
+            cyrillic += n
+            if char in UKRAINIAN_LETTERS:
+                ukrainian += n
+        elif char in LATIN_LETTERS:
+            latin += n
+    letters = cyrillic + latin
+    if not letters:
+        return "en", 0.0
+    if ukrainian or cyrillic > latin:
+        return "uk", cyrillic / letters
+    return "en", latin / letters
+
+
+def detect_language(text: str) -> str:
+    return language_confidence(text)[0]
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00ad", "")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"^ ?[\u25aa\u25cf\u25e6\u25a0\u25cb\u25ba\u2023\u2219\u00b7*] *", "• ", text, flags=re.MULTILINE)
+    text = re.sub(r" *\n *", "\n", text)
+    return text
+
+
+def _repeated_edges(pages: list) -> set:
+    """Lowercased lines found among the first or last two lines of most pages."""
+    if len(pages) < 3:
+        return set()
+    edges = Counter()
+    for lines in pages:
+        edges.update({line.strip().lower() for line in lines[:2] + lines[-2:] if line.strip()})
+    return {line for line, n in edges.items() if n >= max(3, len(pages) // 2)}
+
+
+def heading_key(line: str):
+    """The SECTION_HEADINGS key a line introduces, or None."""
+    heading = line.strip().strip(":•#*").strip().lower()
+    return HEADING_LOOKUP.get(heading) if len(heading) < 40 else None
+
+
+def render_blocks(blocks, page_break: str = PAGE_BREAK) -> str:
+    """
+    Text of extractors.Block items: one line per block, bullets marked "• ", cells of a table row
+    joined with " | ", a blank line before each heading and page_break between pages.
+    """
+    lines = []
+    page = row = None
+    for block in blocks:
+        if page is not None and block.page != page and lines:
+            lines[-1] += page_break
+        page = block.page
+        if block.kind == "table_cell":
+            text = block.text.replace("\n", " ")
+            if block.cell[:2] == row:
+                lines[-1] += " | " + text
+                continue
+            row = block.cell[:2]
+            lines.append(text)
+            continue
+        row = None
+        if block.kind == "heading" and lines:
+            lines.append("")
+        lines.append("• " + block.text if block.kind == "bullet" else block.text)
+    return "\n".join(lines)
+
+
+def strip_block_furniture(blocks) -> list:
+    """
+    Drops page-number blocks and lines repeated at the top or bottom of most pages (headers/footers);
+    the first occurrence of a repeated line is kept, as a running header is often the candidate's name.
+    """
+    pages = {}
+    for block in blocks:
+        pages.setdefault(block.page, []).append(block)
+    repeated = _repeated_edges([[block.text for block in page] for page in pages.values()])
+
+    kept = []
+    seen = set()
+    for block in blocks:
+        stripped = block.text.strip().lower()
+        if not stripped or PAGE_NUMBER_RE.match(stripped):
+            continue
+        if stripped in repeated:
+            if stripped in seen:
+                continue
+            seen.add(stripped)
+        kept.append(block)
+    return kept
+
+
+def segment_blocks(blocks) -> list:
+    """Splits extractors.Block items into [(section_key, text)]; only heading blocks can start a section."""
+    sections = [["header", []]]
+    for block in blocks:
+        key = heading_key(block.text) if block.kind == "heading" else None
+        if key:
+            sections.append([key, [block]])
+        else:
+            sections[-1][1].append(block)
+    rendered = [(key, normalize_text(render_blocks(items, page_break="")).strip()) for key, items in sections]
+    return [(key, text) for key, text in rendered if text]
+
+
+def _priority(key: str) -> int:
+    return HEADER_PRIORITY if key == "header" else SECTION_HEADINGS[key][1]
+
+
+def _trim(text: str, max_tokens: int) -> str:
+    """Keeps the leading lines of a section (most recent roles come first in a CV)."""
+    lines = text.split("\n")
+    line_tokens = [count_tokens(line) + 1 for line in lines]
+    tokens = sum(line_tokens)
+    while len(lines) > 1 and tokens > max_tokens:
+        tokens -= line_tokens.pop()
+        lines.pop()
+    return "\n".join(lines)
+
+
+def fit_to_budget(sections: list, max_tokens: int):
+    """
+    Fits the CV into max_tokens: first drops low-value sections (references, hobbies, ...),
+    then trims the rest in order of increasing value, each down to SECTION_FLOOR_TOKENS.
+    Returns (text, dropped_or_trimmed_section_keys).
+    """
+    sections = [[key, text, count_tokens(text)] for key, text in sections]
+    total = sum(tokens for _, _, tokens in sections)
+    changed = []
+
+    by_value = sorted(sections, key=lambda s: _priority(s[0]))
+    for item in by_value:
+        if total <= max_tokens or _priority(item[0]) >= DROPPABLE_BELOW:
+            break
+        total -= item[2]
+        item[1], item[2] = "", 0
+        changed.append(item[0])
+
+    for item in by_value:
+        if total <= max_tokens:
+            break
+        if not item[1] or item[2] <= SECTION_FLOOR_TOKENS:
+            continue
+        target = max(SECTION_FLOOR_TOKENS, item[2] - (total - max_tokens))
+        trimmed = _trim(item[1], target)
+        tokens = count_tokens(trimmed)
+        total -= item[2] - tokens
+        item[1], item[2] = trimmed, tokens
+        changed.append(f"{item[0]} (trimmed)")
+
+    text = "\n\n".join(text for _, text, _ in sections if text)
+    if total > max_tokens:
+        text = _trim(text, max_tokens)
+    return text, changed
+
+
+def compact_blocks(blocks, max_tokens: int = CV_TOKEN_BUDGET):
+    """
+    Strips headers/footers from extractors.Block items and fits the CV to the token budget;
+    the whole CV is only joined into one string once compacted. Returns (compact_text, stats).
+    """
+    tokens_before = sum(count_tokens(block.text) + 1 for block in blocks)
+    compact, dropped = fit_to_budget(segment_blocks(strip_block_furniture(blocks)), max_tokens)
+    tokens_after = count_tokens(compact)
+    return compact, {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "dropped": dropped,
+    }
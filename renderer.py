@@ -0,0 +1,108 @@
+import asyncio
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+from config import RENDER_WORKERS
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+_pool = None
+
+
+@lru_cache(maxsize=1)
+def get_env():
+    """Jinja environment, created once per process; it keeps the parsed template in its cache."""
+    from jinja2 import Environment, FileSystemLoader
+
+    return Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+
+
+def _warm_worker():
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    get_env().get_template("report_template.html")
+    getSampleStyleSheet()
+    try:
+        import weasyprint  # noqa: F401 — pays the pango/cairo load once per worker
+    except (ImportError, OSError) as e:
+        logging.warning(f"WeasyPrint is unavailable in renderer worker: {e}")
+
+
+def render_html_pdf_bytes(user_data: dict, now: datetime = None) -> bytes:
+    """
+    user_data = {
+        'name': 'John Doe',
+        'summary': 'Experienced Project Manager...',
+        'sections': [
+            {'title': 'Summary/Profile', 'score': 7, 'feedback': 'Try to personalize...'},
+            {'title': 'Skills & Qualifications', 'score': 8, 'feedback': 'Strong technical skills...'},
+            {'title': 'Experience', 'score': 6, 'feedback': 'Quantify your achievements...'},
+            {'title': 'Education', 'score': 9, 'feedback': 'Well-detailed and relevant.'},
+            {'title': 'Formatting & ATS', 'score': 5, 'feedback': 'Avoid tables and columns...'}
+        ],
+        'overall_score': 70,
+        'recommendations': [
+            'Use action verbs.',
+            'Include metrics in experience.',
+            'Tailor the CV for each application.'
+        ]
+    }
+    """
+    from weasyprint import HTML
+
+    template = get_env().get_template("report_template.html")
+    html_out = template.render(data=user_data, now=now or datetime.now())
+    return HTML(string=html_out).write_pdf()
+
+
+def render_text_pdf_bytes(text: str) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+    styles = getSampleStyleSheet()
+    story = []
+    for part in text.split("\n\n"):
+        story.append(Paragraph(part.strip().replace("\n", "<br/>"), styles["Normal"]))
+        story.append(Spacer(1, 12))
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, initializer=_warm_worker)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def render(report_data: dict) -> bytes:
+    """HTML report (WeasyPrint) rendered in a warm worker process."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), render_html_pdf_bytes, report_data, datetime.now())
+
+
+async def render_text(text: str) -> bytes:
+    """Plain-text report (ReportLab) rendered in a warm worker process."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), render_text_pdf_bytes, text)
+
+
+def write_pdf(pdf_bytes: bytes, output_path: str) -> str:
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(pdf_bytes)
+    return output_path
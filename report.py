@@ -0,0 +1,133 @@
+import json
+from dataclasses import dataclass, field, asdict
+
+SECTION_TITLES = {
+    "sum": "Summary/Profile",
+    "skills": "Skills & Qualifications",
+    "exp": "Experience",
+    "edu": "Education",
+    "fmt": "Formatting & ATS",
+}
+
+# JSON schema the model is asked to fill in structured-output mode.
+REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "key": {"type": "string", "enum": list(SECTION_TITLES)},
+                    "score": {"type": "integer"},
+                    "feedback": {"type": "string"},
+                    "rewrite": {"type": "string"},
+                },
+                "required": ["key", "score", "feedback", "rewrite"],
+                "additionalProperties": False,
+            },
+        },
+        "overall_score": {"type": "integer"},
+        "recommendations": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "sections", "overall_score", "recommendations"],
+    "additionalProperties": False,
+}
+
+REPORT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "cv_report", "strict": True, "schema": REPORT_SCHEMA},
+}
+
+
+@dataclass
+class SectionReport:
+    key: str
+    score: int
+    feedback: str
+    rewrite: str = ""
+
+    @property
+    def title(self) -> str:
+        return SECTION_TITLES.get(self.key, self.key)
+
+
+@dataclass
+class CVReport:
+    """
+    Typed CV report shared by the chat text, the HTML template and the step-by-step flow.
+    """
+    summary: str
+    sections: list = field(default_factory=list)
+    overall_score: int = 0
+    recommendations: list = field(default_factory=list)
+    name: str = ""
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CVReport":
+        try:
+            payload = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Report is not valid JSON: {e}") from e
+        return cls.from_dict(payload)
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "CVReport":
+        if not isinstance(payload, dict):
+            raise ValueError("Report must be a JSON object")
+        missing = [k for k in REPORT_SCHEMA["required"] if k not in payload]
+        if missing:
+            raise ValueError(f"Report is missing fields: {', '.join(missing)}")
+
+        sections = []
+        for item in payload["sections"]:
+            if not isinstance(item, dict) or item.get("key") not in SECTION_TITLES:
+                raise ValueError(f"Unknown report section: {item!r}")
+            sections.append(SectionReport(
+                key=item["key"],
+                score=max(0, min(10, int(item.get("score", 0)))),
+                feedback=str(item.get("feedback", "")).strip(),
+                rewrite=str(item.get("rewrite", "")).strip(),
+            ))
+        if not sections:
+            raise ValueError("Report has no sections")
+
+        return cls(
+            summary=str(payload["summary"]).strip(),
+            sections=sections,
+            overall_score=max(0, min(100, int(payload["overall_score"]))),
+            recommendations=[str(r).strip() for r in payload["recommendations"] if str(r).strip()],
+            name=str(payload.get("name", "")),
+        )
+
+    def as_dict(self) -> dict:
+        """Template data in the same shape parse_gpt_output produces, plus key/rewrite per section."""
+        data = asdict(self)
+        for section, item in zip(self.sections, data["sections"]):
+            item["title"] = section.title
+        return data
+
+    def to_text(self) -> str:
+        parts = [self.summary]
+        for section in self.sections:
+            block = f"**{section.title}** ({section.score}/10)\n{section.feedback}"
+            if section.rewrite:
+                block += f"\n✏️ {section.rewrite}"
+            parts.append(block)
+
+        scores = "\n".join(f"• {s.title}: {s.score} / 10" for s in self.sections)
+        parts.append(f"📊 CV Score Breakdown:\n{scores}\n\n🌟 Overall Score: {self.overall_score} / 100")
+        if self.recommendations:
+            parts.append("📌 Recommendations:\n" + "\n".join(f"• {r}" for r in self.recommendations))
+        return "\n\n".join(parts)
+
+    def step_sections(self) -> list:
+        """(key, label, text) tuples in the order the step-by-step flow shows them."""
+        result = []
+        for section in self.sections:
+            text = f"**{section.title}**\n{section.feedback}"
+            if section.rewrite:
+                text += f"\n\n✏️ {section.rewrite}"
+            result.append((section.key, section.title, text))
+        return result
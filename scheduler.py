@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from collections import OrderedDict, deque
+
+from config import LLM_MAX_CONCURRENT, LLM_MAX_RETRIES, LLM_RETRY_BACKOFF
+import metrics
+
+
+def is_retryable(error: Exception) -> bool:
+    import openai  # already loaded by clients.get_openai by the time a request fails
+
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+def _retry_delay(error: Exception, attempt: int, backoff: float) -> float:
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return backoff * 2 ** attempt + random.uniform(0, backoff)
+
+
+class JobScheduler:
+    """
+    Runs analysis jobs with a global concurrency cap and at most one in-flight job per user.
+    Waiting users are served round-robin, so one user's burst cannot starve the others.
+    Jobs failing with 429/5xx/connection errors are retried with exponential backoff.
+    Cancelling the caller of submit() drops a queued job, or cancels it if it is already running.
+    """
+
+    def __init__(self, max_concurrent: int = LLM_MAX_CONCURRENT, max_retries: int = LLM_MAX_RETRIES,
+                 backoff: float = LLM_RETRY_BACKOFF):
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._pending = OrderedDict()  # user_id -> deque of (job, future, context, queued_at); order = round-robin turn
+        self._running = set()
+        self._tasks = set()
+        self.retries = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def queued(self) -> int:
+        return sum(len(jobs) for jobs in self._pending.values())
+
+    def _position(self, user_id) -> int:
+        """1-based place of user_id's newest job in the round-robin order."""
+        mine = len(self._pending[user_id])
+        ahead = mine - 1 + sum(min(len(jobs), mine) for uid, jobs in self._pending.items() if uid != user_id)
+        return ahead + 1
+
+    async def submit(self, user_id, job, on_queued=None):
+        """
+        job — zero-argument callable returning a fresh coroutine (it may be called again on retry).
+        on_queued — optional coroutine called with the queue position if the job cannot start right away.
+        """
+        future = asyncio.get_running_loop().create_future()
+        # Jobs run in the submitter's context, whichever task happens to dispatch them (see metrics.trace).
+        entry = (job, future, contextvars.copy_context(), time.perf_counter())
+        self._pending.setdefault(user_id, deque()).append(entry)
+        self._dispatch()
+        waiting = any(e is entry for e in self._pending.get(user_id, ()))
+        if waiting and on_queued:
+            await on_queued(self._position(user_id))
+        return await future
+
+    def _dispatch(self):
+        while len(self._running) < self.max_concurrent:
+            user_id = next((uid for uid in self._pending if uid not in self._running), None)
+            if user_id is None:
+                return
+            jobs = self._pending.pop(user_id)
+            job, future, context, queued_at = jobs.popleft()
+            if jobs:
+                self._pending[user_id] = jobs  # re-queued at the back: next turn goes to other users
+            if future.cancelled():
+                self.cancelled += 1
+                continue
+            self._running.add(user_id)
+            context.run(metrics.observe, "queue", time.perf_counter() - queued_at)
+            task = context.run(asyncio.create_task, self._run(user_id, job, future))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, user_id, job, future):
+        try:
+            for attempt in range(self.max_retries + 1):
+                if future.cancelled():
+                    raise asyncio.CancelledError
+                try:
+                    attempt_task = asyncio.ensure_future(job())
+                    future.add_done_callback(lambda f, t=attempt_task: f.cancelled() and t.cancel())
+                    result = await attempt_task
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries or not is_retryable(e):
+                        raise
+                    delay = _retry_delay(e, attempt, self.backoff)
+                    self.retries += 1
+                    logging.warning(f"Job for user {user_id} failed ({e}); retry {attempt + 1} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+            self.completed += 1
+            if not future.done():
+                future.set_result(result)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            self.cancelled += 1
+        except Exception as e:
+            self.failed += 1
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._running.discard(user_id)
+            self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self._running),
+            "queued": self.queued(),
+            "retries": self.retries,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+
+scheduler = JobScheduler()
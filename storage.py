@@ -1 +1,539 @@
-# storage.py placeholder
\ No newline at end of file
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from config import (
+    TEXT_CACHE_DIR,
+    TEXT_CACHE_MEMORY_ITEMS,
+    TEXT_CACHE_DISK_MB,
+    OCR_CACHE_DIR,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_ITEMS,
+    SECTION_CACHE_ITEMS,
+    SESSION_BACKEND,
+    SESSION_DB_PATH,
+    SESSION_TTL,
+    SESSION_MAX_ITEMS,
+    SESSION_FLUSH_INTERVAL,
+    SESSION_BATCH_SIZE,
+    HISTORY_ENABLED,
+    HISTORY_DB_PATH,
+    HISTORY_RETENTION_DAYS,
+)
+
+
+def bytes_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class TextCache:
+    """
+    Two-tier cache of extracted CV text keyed by the hash of the file bytes:
+    an in-memory LRU in front of a directory of JSON files evicted by total size.
+    """
+
+    def __init__(self, cache_dir: str = TEXT_CACHE_DIR, memory_items: int = TEXT_CACHE_MEMORY_ITEMS,
+                 disk_bytes: int = TEXT_CACHE_DISK_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_size = None
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: dict):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mtime doubles as the disk tier's LRU clock
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits_disk += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: dict):
+        with self._lock:
+            self._remember(key, value)
+
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # A temp file per writer: the same CV can be uploaded (and cached) twice at once.
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{key}.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            logging.warning(f"Text cache: could not write {key}, keeping it in memory only: {e}")
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        self._evict_disk(size)
+
+    def _disk_entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict_disk(self, added: int):
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_size += added
+            if self._disk_size <= self.disk_bytes:
+                return
+
+            for _, size, path in sorted(self._disk_entries()):
+                if self._disk_size <= self.disk_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._disk_size -= size
+            logging.info(f"Text cache evicted down to {self._disk_size} bytes")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.hits_memory + self.hits_disk
+            total = hits + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_items": len(self._memory),
+            }
+
+
+class ResponseCache:
+    """
+    In-memory cache of LLM replies keyed on model, prompt and sampling parameters,
+    with a TTL per entry and LRU eviction once max_items is reached.
+    """
+
+    def __init__(self, ttl: int = LLM_CACHE_TTL, max_items: int = LLM_CACHE_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(prompt: str, **params) -> str:
+        payload = json.dumps({"prompt": prompt, **params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        entry = self._items.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._items.pop(key, None)
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, value: str):
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "items": len(self._items),
+        }
+
+
+_REVISION_SEPARATOR_RE = re.compile(r"[^\w+#]+")
+_REVISION_TOKEN_RE = re.compile(r"[\w+#]+")
+
+# Words whose presence does not change what a section says. Negations ("not", "без") and prepositions
+# ("for" vs "with" a company) are deliberately left out.
+REVISION_FILLER_WORDS = frozenset({
+    "a", "an", "the", "and", "also", "very", "really", "just", "is", "are", "was", "were",
+    "і", "й", "та", "а", "також", "дуже",
+})
+
+
+def normalize_revision(text: str) -> str:
+    """Whitespace and punctuation folded to single spaces; words, numbers, case and "C++"/"C#" are kept."""
+    return _REVISION_SEPARATOR_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def revision_tokens(text: str) -> tuple:
+    """The words a rewrite depends on: casefolded, without punctuation or REVISION_FILLER_WORDS; numbers and names stay."""
+    tokens = _REVISION_TOKEN_RE.findall(unicodedata.normalize("NFKC", text).casefold())
+    return tuple(token for token in tokens if token not in REVISION_FILLER_WORDS)
+
+
+class SectionCache:
+    """
+    Replies to section rewrites, reused when a user sends a revision of a section (e.g. after "Edit again")
+    that differs from one already rewritten only in case, punctuation, whitespace or REVISION_FILLER_WORDS.
+    Every other word, number and name must match, so any real edit goes to the model. Entries are per user:
+    a rewrite quotes the user's own CV.
+    """
+
+    def __init__(self, max_items: int = SECTION_CACHE_ITEMS):
+        self.max_items = max_items
+        self._items = OrderedDict()  # key -> (normalize_revision(text), reply)
+        self.hits_exact = 0
+        self.hits_near = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_id, section: str, text: str):
+        tokens = revision_tokens(text)
+        if not tokens:
+            return None
+        return hashlib.sha256(f"{user_id}\0{section}\0{' '.join(tokens)}".encode("utf-8")).hexdigest()
+
+    def lookup(self, user_id, section: str, text: str) -> tuple:
+        """(cached reply or None, "exact" | "near" | "miss")."""
+        key = self._key(user_id, section, text)
+        entry = self._items.get(key) if key else None
+        if entry is None:
+            self.misses += 1
+            return None, "miss"
+        self._items.move_to_end(key)
+        if entry[0] == normalize_revision(text):
+            self.hits_exact += 1
+            return entry[1], "exact"
+        self.hits_near += 1
+        return entry[1], "near"
+
+    def put(self, user_id, section: str, text: str, value: str):
+        key = self._key(user_id, section, text)
+        if key is None:
+            return
+        self._items[key] = (normalize_revision(text), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        hits = self.hits_exact + self.hits_near
+        total = hits + self.misses
+        return {
+            "hits_exact": self.hits_exact,
+            "hits_near": self.hits_near,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "items": len(self._items),
+        }
+
+
+class MemorySessionStore:
+    """
+    Per-user bot sessions (plain JSON-serialisable dicts) held in process memory.
+    Idle sessions expire after ttl seconds; beyond max_items the least recently used are dropped.
+    Callers must save() a session after changing it — other backends return copies.
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL, max_items: int = SESSION_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = OrderedDict()
+
+    def get(self, user_id) -> dict:
+        entry = self._items.get(user_id)
+        if entry is None or entry[0] < time.time():
+            self._items.pop(user_id, None)
+            return {}
+        self._items.move_to_end(user_id)
+        return entry[1]
+
+    def save(self, user_id, session: dict):
+        self._items[user_id] = (time.time() + self.ttl, session)
+        self._items.move_to_end(user_id)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def delete(self, user_id):
+        self._items.pop(user_id, None)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite database (WAL mode) so they survive restarts and can be shared
+    by several worker processes. Writes are buffered and committed in batches, either
+    every flush_interval seconds or once batch_size sessions are dirty.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH, ttl: int = SESSION_TTL,
+                 flush_interval: float = SESSION_FLUSH_INTERVAL, batch_size: int = SESSION_BATCH_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._conn = None
+        self._dirty = {}  # user_id -> session, or None for a pending delete
+        self._last_flush = time.monotonic()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "user_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+        return self._conn
+
+    def get(self, user_id) -> dict:
+        key = str(user_id)
+        if key in self._dirty:
+            session = self._dirty[key]
+            return json.loads(json.dumps(session)) if session is not None else {}
+        row = self._db().execute(
+            "SELECT data FROM sessions WHERE user_id = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def save(self, user_id, session: dict):
+        self._dirty[str(user_id)] = json.loads(json.dumps(session))
+        self._maybe_flush()
+
+    def delete(self, user_id):
+        self._dirty[str(user_id)] = None
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._dirty) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        now = time.time()
+        dirty, self._dirty = self._dirty, {}
+        db = self._db()
+        with db:
+            db.executemany(
+                "INSERT INTO sessions (user_id, data, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+                [(k, json.dumps(v, ensure_ascii=False), now + self.ttl) for k, v in dirty.items() if v is not None],
+            )
+            db.executemany("DELETE FROM sessions WHERE user_id = ?", [(k,) for k, v in dirty.items() if v is None])
+            db.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# Section scores are stored as columns, keyed like report.CVReport sections.
+HISTORY_SECTIONS = ("sum", "skills", "exp", "edu", "fmt")
+_SECTION_WORDS = (
+    ("summ", "sum"), ("profile", "sum"), ("skill", "skills"), ("qualif", "skills"), ("experien", "exp"),
+    ("educat", "edu"), ("format", "fmt"), ("ats", "fmt"),
+    ("профіл", "sum"), ("навич", "skills"), ("кваліф", "skills"), ("досвід", "exp"), ("освіт", "edu"), ("формат", "fmt"),
+)
+
+
+def section_key(title: str):
+    """Column for a section title from parse_gpt_output or a CVReport ("Skills & Qualifications" -> "skills")."""
+    title = title.lower()
+    for word, key in _SECTION_WORDS:
+        if word in title:
+            return key
+    return None
+
+
+class HistoryStore:
+    """
+    Scores of every analysis in a SQLite table: one row per analysis, one integer column
+    per section, indexed by user, mode and time. Trend and average queries read only these
+    columns, never the reports themselves. Rows older than retention_days are pruned at most
+    once an hour, on write.
+    """
+
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self, path: str = HISTORY_DB_PATH, retention_days: int = HISTORY_RETENTION_DAYS):
+        self.path = path
+        self.retention = retention_days * 86400
+        self._conn = None
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            # Must precede table creation; lets prune() hand freed pages back to the filesystem.
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            columns = ", ".join(f"{key} INTEGER" for key in HISTORY_SECTIONS)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, mode TEXT NOT NULL, created_at REAL NOT NULL, "
+                f"file_name TEXT, overall INTEGER, {columns})"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_user ON analyses (user_id, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_mode ON analyses (mode, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_time ON analyses (created_at)")
+        return self._conn
+
+    def add(self, user_id, mode: str, data: dict, file_name: str = None, created_at: float = None):
+        """Records a parse_gpt_output / CVReport.as_dict() result. Returns False if it had no scores."""
+        scores = {}
+        for section in data.get("sections") or []:
+            key = section.get("key") or section_key(section.get("title", ""))
+            if key in HISTORY_SECTIONS and key not in scores:
+                scores[key] = section.get("score")
+        overall = data.get("overall_score") or None
+        if not scores and overall is None:
+            return False
+        now = time.time()
+        row = (str(user_id), mode, created_at or now, file_name, overall, *(scores.get(k) for k in HISTORY_SECTIONS))
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute(f"INSERT INTO analyses (user_id, mode, created_at, file_name, overall, "
+                           f"{', '.join(HISTORY_SECTIONS)}) VALUES ({', '.join('?' * len(row))})", row)
+            if now >= self._next_prune:
+                self._prune(now)
+        return True
+
+    def trend(self, user_id, limit: int = 10, mode: str = None) -> list:
+        """The user's last `limit` analyses, oldest first, as dicts with overall and per-section scores."""
+        query = f"SELECT created_at, mode, file_name, overall, {', '.join(HISTORY_SECTIONS)} FROM analyses WHERE user_id = ?"
+        params = [str(user_id)]
+        if mode:
+            query += " AND mode = ?"
+            params.append(mode)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._db().execute(query, (*params, limit)).fetchall()
+        names = ("created_at", "mode", "file_name", "overall", *HISTORY_SECTIONS)
+        return [dict(zip(names, row)) for row in reversed(rows)]
+
+    def averages(self, user_id=None, mode: str = None, since: float = None) -> dict:
+        """
+        Mean overall and section scores over the matching analyses (all users when user_id is None):
+        {"count": n, "overall": x, "sum": x, ...}; means are None where nothing was scored.
+        """
+        conditions, params = [], []
+        for column, value in (("user_id", None if user_id is None else str(user_id)), ("mode", mode)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        columns = ("overall", *HISTORY_SECTIONS)
+        query = f"SELECT COUNT(*), {', '.join(f'AVG({c})' for c in columns)} FROM analyses"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            row = self._db().execute(query, params).fetchone()
+        return {"count": row[0], **dict(zip(columns, row[1:]))}
+
+    def prune(self, now: float = None) -> int:
+        with self._lock:
+            return self._prune(now or time.time())
+
+    def _prune(self, now: float) -> int:
+        self._next_prune = now + self.PRUNE_INTERVAL
+        db = self._db()
+        with db:
+            deleted = db.execute("DELETE FROM analyses WHERE created_at < ?", (now - self.retention,)).rowcount
+        if deleted:
+            db.executescript("PRAGMA incremental_vacuum;")  # execute() would only step it once, freeing one page
+            logging.info(f"History: pruned {deleted} analyses older than {self.retention // 86400} days")
+        return deleted
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def make_session_store():
+    if SESSION_BACKEND == "sqlite":
+        return SQLiteSessionStore()
+    return MemorySessionStore()
+
+
+text_cache = TextCache()
+ocr_cache = TextCache(cache_dir=OCR_CACHE_DIR)  # OCR text per scanned page
+response_cache = ResponseCache() if LLM_CACHE_ENABLED else None
+section_cache = SectionCache() if SECTION_CACHE_ITEMS > 0 else None
+sessions = make_session_store()
+history = HistoryStore() if HISTORY_ENABLED else None
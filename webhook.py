@@ -0,0 +1,162 @@
+"""
+Webhook entry point: an HTTP listener that receives Telegram updates and routes them
+to WEBHOOK_WORKERS bot processes, sharded by user id so each user's step-by-step flow
+stays on one worker.
+
+    WEBHOOK_URL=https://example.com/telegram WEBHOOK_WORKERS=4 python webhook.py
+
+On SIGTERM/SIGINT the listener stops accepting updates and every worker finishes the
+updates it already received (up to WEBHOOK_DRAIN_TIMEOUT seconds) before exiting.
+Use SESSION_BACKEND=sqlite so sessions also survive a restart.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import (
+    TELEGRAM_TOKEN,
+    TELEGRAM_API_URL,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_PATH,
+    WEBHOOK_URL,
+    WEBHOOK_SECRET,
+    WEBHOOK_WORKERS,
+    WEBHOOK_DRAIN_TIMEOUT,
+    METRICS_PORT,
+)
+
+logging.basicConfig(level=logging.INFO)
+
+UPDATE_SENDERS = ("message", "edited_message", "callback_query", "inline_query", "my_chat_member", "chat_member")
+
+
+def shard_for(update: dict, workers: int) -> int:
+    for field in UPDATE_SENDERS:
+        sender = (update.get(field) or {}).get("from")
+        if sender:
+            return sender["id"] % workers
+    return update.get("update_id", 0) % workers
+
+
+def worker_main(index: int, queue):
+    """Runs one bot Application fed from the router's queue until it receives None."""
+    # The router decides when to drain, by sending None. `systemctl stop` and `kill -TERM -<pgid>` signal
+    # the whole process group, and a worker that died on the spot would drop the updates it already holds.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_serve_worker(index, queue))
+
+
+async def _serve_worker(index: int, queue):
+    from telegram import Update
+    from bot import build_application
+    import metrics
+
+    if METRICS_PORT:
+        metrics.start_server(METRICS_PORT + 1 + index)
+    app = build_application()
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+    logging.info(f"Webhook worker {index} ready")
+
+    loop = asyncio.get_running_loop()
+    while True:
+        data = await loop.run_in_executor(None, queue.get)
+        if data is None:
+            break
+        await app.update_queue.put(Update.de_json(data, app.bot))
+
+    logging.info(f"Webhook worker {index} draining")
+    await app.stop()  # processes everything already queued and waits for running handlers
+    if app.post_shutdown:
+        await app.post_shutdown(app)
+    await app.shutdown()
+    logging.info(f"Webhook worker {index} stopped")
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    queues = []
+    accepting = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        if self.path != WEBHOOK_PATH:
+            self._reply(404)
+            return
+        if WEBHOOK_SECRET and self.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+            self._reply(403)
+            return
+        if not self.accepting:
+            self._reply(503)  # Telegram retries the update later, once we are back
+            return
+        try:
+            update = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self._reply(400)
+            return
+        self.queues[shard_for(update, len(self.queues))].put(update)
+        self._reply(200)
+
+
+async def register_webhook():
+    from telegram import Bot
+
+    kwargs = {"base_url": f"{TELEGRAM_API_URL}/bot"} if TELEGRAM_API_URL else {}
+    async with Bot(TELEGRAM_TOKEN, **kwargs) as bot:
+        await bot.set_webhook(WEBHOOK_URL, secret_token=WEBHOOK_SECRET)
+    logging.info(f"Webhook registered at {WEBHOOK_URL}")
+
+
+def run(workers: int = WEBHOOK_WORKERS, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT):
+    ctx = multiprocessing.get_context("spawn")
+    queues = [ctx.Queue() for _ in range(workers)]
+    processes = [ctx.Process(target=worker_main, args=(i, q), name=f"webhook-worker-{i}") for i, q in enumerate(queues)]
+    for process in processes:
+        process.start()
+
+    handler = type("Handler", (WebhookHandler,), {"queues": queues})
+    server = ThreadingHTTPServer((host, port), handler)
+    stopping = threading.Event()
+
+    def drain(signum, frame):
+        if stopping.is_set():
+            return
+        stopping.set()
+        logging.info("Shutting down: no longer accepting updates, draining workers")
+        handler.accepting = False
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, drain)
+    signal.signal(signal.SIGINT, drain)
+
+    if WEBHOOK_URL:
+        asyncio.run(register_webhook())
+    logging.info(f"Listening for updates on http://{host}:{port}{WEBHOOK_PATH} with {workers} workers")
+    server.serve_forever()
+    server.server_close()
+
+    for q in queues:
+        q.put(None)
+    for process in processes:
+        process.join(WEBHOOK_DRAIN_TIMEOUT)
+        if process.is_alive():
+            logging.warning(f"{process.name} did not drain in {WEBHOOK_DRAIN_TIMEOUT:.0f}s, killing it")
+            process.kill()  # workers ignore SIGTERM
+
+
+if __name__ == "__main__":
+    run()